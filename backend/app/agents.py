@@ -0,0 +1,35 @@
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+
+class AgentRegistry:
+    """Builds one Agent per (stage, model) on first use and reuses it across requests"""
+    def __init__(self, configs: Dict[str, Dict[str, Any]]):
+        self.configs = configs
+        self._agents: Dict[Tuple[str, Any], "Agent"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, stage: str, model: Optional[Any] = None) -> "Agent":
+        """Return the cached agent for a stage, building it if needed"""
+        config = self.configs[stage]
+        model = model or config["model"]
+        # Model objects are unhashable dataclasses; the cached agent keeps them alive so id() is stable
+        key = (stage, model if isinstance(model, str) else id(model))
+        agent = self._agents.get(key)
+        if agent is None:
+            # Double-checked so concurrent first requests build the agent only once
+            with self._lock:
+                agent = self._agents.get(key)
+                if agent is None:
+                    # Imported here so pydantic_ai (and its providers) load on the first agent call, not at startup
+                    from pydantic_ai import Agent
+                    agent = Agent(**{**config, "model": model})
+                    self._agents[key] = agent
+        return agent
+
+    def clear(self):
+        """Drop all cached agents, e.g. after changing a stage config"""
+        with self._lock:
+            self._agents.clear()
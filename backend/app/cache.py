@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def output_adapter(output_type: Any) -> TypeAdapter:
+    """Shared TypeAdapter for serializing and validating a stage's output type"""
+    return TypeAdapter(output_type)
+
+@lru_cache(maxsize=None)
+def output_schema(output_type: Any) -> Dict[str, Any]:
+    """JSON schema of a stage's output type, part of every cache key"""
+    return output_adapter(output_type).json_schema()
+
+def model_name(model: Any) -> str:
+    """Stable name for a model given either as a string or a Model instance"""
+    if isinstance(model, str):
+        return model
+    return f"{getattr(model, 'system', '')}:{getattr(model, 'model_name', type(model).__name__)}"
+
+class ResponseCache:
+    """Content-addressed cache of agent outputs
+
+    Entries live in an in-memory LRU tier and, when ``path`` is given, in a
+    SQLite tier that survives restarts. Both tiers honour ``ttl`` (seconds);
+    the disk tier is additionally trimmed to ``max_disk_bytes`` by evicting the
+    least recently used entries.
+    """
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_memory_entries: int = 512,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, stage TEXT, value TEXT, size INTEGER, "
+                "created_at REAL, accessed_at REAL)"
+            )
+            self._db.commit()
+            self._evict()
+
+    @staticmethod
+    def make_key(stage: str, model: str, system_prompt: Any, prompt: str, output_schema: Dict[str, Any]) -> str:
+        """Hash everything that determines a stage's output"""
+        payload = json.dumps(
+            [stage, model, system_prompt, prompt, output_schema],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached JSON for a key, or None on a miss"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[1], row[0])
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str, stage: str = ""):
+        """Store JSON for a key in every tier"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.counters["writes"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, stage, value, len(value), now, now)
+                )
+                self._db.commit()
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= 50:
+                    self._evict()
+
+    def _remember(self, key: str, created_at: float, value: str):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _evict(self):
+        """Drop expired disk entries, then the least recently used ones over the size budget"""
+        self._writes_since_evict = 0
+        if self.ttl is not None:
+            cursor = self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self.counters["evictions"] += cursor.rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_disk_bytes:
+            for key, size in self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at"
+            ).fetchall():
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["evictions"] += 1
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
+        self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current tier sizes"""
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            stats = dict(self.counters)
+            stats["hit_rate"] = hits / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return stats
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
@@ -0,0 +1,139 @@
+"""Run brainstorming sessions for every idea in a JSONL file, without the API or UI.
+
+Each input line is an IdeaInput object (optionally with an "id") or a bare
+JSON string holding the idea text. Results are appended to results.jsonl in
+the output directory as each idea finishes, with a markdown report per idea.
+Rerunning with the same output directory skips ideas that already succeeded
+and resumes unfinished ones from their checkpointed stages.
+
+Run from the backend directory:
+
+    python -m app.cli ideas.jsonl --output runs/nightly --workers 8 --participant-count 3
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from shared.models import IdeaInput, SessionRequest, SessionResult
+from .config import idea_symphony_from_env
+from .sessions import SessionStore
+
+RESULTS_FILE = "results.jsonl"
+SESSIONS_FILE = "sessions.sqlite3"
+
+def read_ideas(path: str) -> List[Tuple[str, IdeaInput]]:
+    """(id, idea) for every non-blank line; ids default to a hash of the idea so reordering keeps them"""
+    ideas: List[Tuple[str, IdeaInput]] = []
+    seen: Set[str] = set()
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if isinstance(data, str):
+                data = {"idea_text": data}
+            idea_id = str(data.pop("id", "") or "")
+            idea = IdeaInput.model_validate(data)
+            idea_id = idea_id or hashlib.sha1(idea.model_dump_json().encode("utf-8")).hexdigest()[:12]
+            if idea_id in seen:
+                print(f"line {number}: skipping duplicate idea {idea_id}", file=sys.stderr)
+                continue
+            seen.add(idea_id)
+            ideas.append((idea_id, idea))
+    return ideas
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids of ideas already recorded as succeeded in a results file"""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if record.get("error") is None and record.get("result") is not None:
+                done.add(record["id"])
+    return done
+
+def markdown_report(idea_id: str, idea: IdeaInput, result: SessionResult) -> str:
+    synthesis = result.final_synthesis
+    lines = idea.idea_text.strip().splitlines()
+    title = lines[0][:120] if lines else idea_id
+    sections = [f"# {title}", "## Synthesis", synthesis.synthesized_content]
+    if synthesis.attributed_content:
+        sections += ["## Attributed synthesis", synthesis.attributed_content]
+    sections += ["## Context", result.context.context]
+    return "\n\n".join(sections) + "\n"
+
+async def run(args) -> Dict[str, Any]:
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, RESULTS_FILE)
+    ideas = read_ideas(args.input)
+    done = completed_ids(results_path)
+    pending = [(idea_id, idea) for idea_id, idea in ideas if idea_id not in done]
+    print(f"{len(ideas)} ideas, {len(ideas) - len(pending)} already done, {len(pending)} to run", file=sys.stderr)
+
+    # Configured like the API, except checkpoints live in the output directory and are kept until it is removed
+    symphony = idea_symphony_from_env(
+        sessions=SessionStore(os.path.join(args.output, SESSIONS_FILE), ttl=None, max_sessions=None),
+        max_concurrency=args.max_concurrency
+    )
+    semaphore = asyncio.Semaphore(args.workers)
+    counts = {"succeeded": 0, "failed": 0}
+    with open(results_path, "a") as results:
+        async def process(idea_id: str, idea: IdeaInput):
+            async with semaphore:
+                start = time.perf_counter()
+                record: Dict[str, Any] = {"id": idea_id, "result": None, "error": None}
+                try:
+                    # The idea id is the session id, so checkpoints survive restarts and input reordering
+                    result = await symphony.run_pipeline(
+                        SessionRequest(
+                            idea_input=idea,
+                            model_count=args.model_count,
+                            participant_count=args.participant_count
+                        ),
+                        session_id=idea_id
+                    )
+                    if args.markdown:
+                        with open(os.path.join(args.output, f"{idea_id}.md"), "w") as f:
+                            f.write(markdown_report(idea_id, idea, result))
+                    record["result"] = result.model_dump(mode="json")
+                except Exception as e:
+                    record["error"] = str(e)
+                elapsed = time.perf_counter() - start
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            counts["failed" if record["error"] else "succeeded"] += 1
+            status = f"failed: {record['error']}" if record["error"] else "ok"
+            print(f"[{sum(counts.values())}/{len(pending)}] {idea_id} {status} ({elapsed:.1f}s)", file=sys.stderr)
+
+        await asyncio.gather(*(process(idea_id, idea) for idea_id, idea in pending))
+    return {"total": len(ideas), "skipped": len(ideas) - len(pending), **counts}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file with one idea per line")
+    parser.add_argument("--output", required=True, help="directory for results.jsonl, reports and checkpoints")
+    parser.add_argument("--model-count", type=int, default=1)
+    parser.add_argument("--participant-count", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4, help="ideas processed at once")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="agent calls in flight across all ideas (default IDEA_SYMPHONY_MAX_CONCURRENCY)")
+    parser.add_argument("--no-markdown", dest="markdown", action="store_false", help="only write results.jsonl")
+    args = parser.parse_args(argv)
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
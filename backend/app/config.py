@@ -0,0 +1,87 @@
+import json
+import os
+from typing import Optional
+from .cache import ResponseCache
+from .documents import DocumentStore
+from .idea_symphony import IdeaSymphony
+from .metrics import Metrics
+from .scheduler import ProviderScheduler
+from .sessions import SessionStore
+
+def optional_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """Optional LLM response cache: "memory" for in-process only, or a path to a SQLite file"""
+    cache_setting = os.getenv('IDEA_SYMPHONY_CACHE', '')
+    if not cache_setting:
+        return None
+    return ResponseCache(
+        path=None if cache_setting == 'memory' else cache_setting,
+        ttl=float(os.getenv('IDEA_SYMPHONY_CACHE_TTL', str(7 * 24 * 3600))),
+        max_disk_bytes=int(os.getenv('IDEA_SYMPHONY_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    )
+
+def idea_symphony_from_env(
+    sessions: Optional[SessionStore] = None,
+    metrics: Optional[Metrics] = None,
+    max_concurrency: Optional[int] = None
+) -> IdeaSymphony:
+    """IdeaSymphony configured from the IDEA_SYMPHONY_* environment variables (see .env.example)
+
+    Shared by the API and the CLI so both run with the same models, limits,
+    cache, document store and fake-model settings. ``max_concurrency``
+    overrides IDEA_SYMPHONY_MAX_CONCURRENCY.
+    """
+    max_concurrency = max_concurrency or int(os.getenv('IDEA_SYMPHONY_MAX_CONCURRENCY', '8'))
+    # Provider rate limits: defaults for every model plus optional JSON overrides,
+    # e.g. IDEA_SYMPHONY_MODEL_LIMITS='{"google-gla:gemini-2.0-flash": [60, 1000000]}'
+    scheduler = ProviderScheduler(
+        rpm=optional_float('IDEA_SYMPHONY_RPM'),
+        tpm=optional_float('IDEA_SYMPHONY_TPM'),
+        model_limits={
+            model: tuple(limits)
+            for model, limits in json.loads(os.getenv('IDEA_SYMPHONY_MODEL_LIMITS', '{}')).items()
+        },
+        max_in_flight=max_concurrency
+    )
+    # Uploaded documents are stored on disk and referenced by id from IdeaInput; unused ones are pruned
+    documents = DocumentStore(
+        directory=os.getenv('IDEA_SYMPHONY_DOCUMENT_DIR') or None,
+        max_bytes=int(os.getenv('IDEA_SYMPHONY_MAX_DOCUMENT_BYTES', str(20 * 1024 * 1024))),
+        ttl=float(os.getenv('IDEA_SYMPHONY_DOCUMENT_TTL', str(7 * 24 * 3600))),
+        max_total_bytes=int(os.getenv('IDEA_SYMPHONY_DOCUMENT_MAX_TOTAL_BYTES', str(1024 * 1024 * 1024)))
+    )
+    # Similarity above which answers are grouped before synthesis, or "off"
+    answer_similarity = os.getenv('IDEA_SYMPHONY_ANSWER_SIMILARITY', '0.85')
+    symphony = IdeaSymphony(
+        max_concurrency=max_concurrency,
+        question_models=[m.strip() for m in os.getenv('IDEA_SYMPHONY_QUESTION_MODELS', '').split(',') if m.strip()],
+        question_timeout=float(os.getenv('IDEA_SYMPHONY_QUESTION_TIMEOUT', '120')),
+        cache=response_cache_from_env(),
+        scheduler=scheduler,
+        hierarchical_synthesis_threshold=int(os.getenv('IDEA_SYMPHONY_HIERARCHICAL_THRESHOLD', '100')),
+        large_document_threshold=int(os.getenv('IDEA_SYMPHONY_LARGE_DOCUMENT_CHARS', '40000')),
+        document_section_tokens=int(os.getenv('IDEA_SYMPHONY_DOCUMENT_SECTION_TOKENS', '4000')),
+        documents=documents,
+        question_merge=os.getenv('IDEA_SYMPHONY_QUESTION_MERGE', 'auto'),
+        local_question_limit=int(os.getenv('IDEA_SYMPHONY_LOCAL_QUESTION_LIMIT', '40')),
+        question_similarity=float(os.getenv('IDEA_SYMPHONY_QUESTION_SIMILARITY', '0.85')),
+        answer_similarity=None if answer_similarity == 'off' else float(answer_similarity),
+        sessions=sessions,
+        metrics=metrics,
+        batch_concurrency=int(os.getenv('IDEA_SYMPHONY_BATCH_CONCURRENCY', '4'))
+    )
+    # Offline mode: replace every provider model with a latency-simulating fake
+    if os.getenv('IDEA_SYMPHONY_FAKE_MODEL'):
+        from .fake_model import build_fake_model
+        symphony.use_model(build_fake_model(
+            latency=os.getenv('IDEA_SYMPHONY_FAKE_LATENCY', 'lognormal'),
+            latency_mean=float(os.getenv('IDEA_SYMPHONY_FAKE_LATENCY_MEAN', '1.0')),
+            latency_sigma=float(os.getenv('IDEA_SYMPHONY_FAKE_LATENCY_SIGMA', '0.5')),
+            error_rate=float(os.getenv('IDEA_SYMPHONY_FAKE_ERROR_RATE', '0')),
+            error_status=int(os.getenv('IDEA_SYMPHONY_FAKE_ERROR_STATUS', '503')),
+            seed=int(os.getenv('IDEA_SYMPHONY_FAKE_SEED')) if os.getenv('IDEA_SYMPHONY_FAKE_SEED') else None
+        ))
+    return symphony
@@ -0,0 +1,107 @@
+import re
+from typing import Dict, FrozenSet, List, Tuple
+import numpy as np
+from shared.models import BrainstormQuestion, BrainstormQuestionGroup, BrainstormQuestions, BrainstormResponse
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def shingles(text: str, k: int = 4) -> FrozenSet[str]:
+    """Character k-grams of the normalized text; short texts yield themselves"""
+    text = normalize(text)
+    if len(text) <= k:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + k] for i in range(len(text) - k + 1))
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def merge_question_sets(
+    question_sets: List[BrainstormQuestions],
+    threshold: float = 0.85,
+    heading_threshold: float = 0.5
+) -> BrainstormQuestions:
+    """Merge question sets locally, dropping near-duplicate questions
+
+    Questions are compared by the Jaccard similarity of the character shingles
+    of their summary and, separately, of their description; a question is a
+    duplicate only when both are at least ``threshold`` similar to a question
+    already kept. Shingles cannot tell "marketing budget" from "hiring
+    budget", so only near-verbatim repeats are dropped, and the more detailed
+    of the two questions is kept whole. Groups whose headings share at least
+    ``heading_threshold`` of their words are combined under the first heading
+    seen.
+    """
+    groups: List[Tuple[FrozenSet[str], BrainstormQuestionGroup]] = []
+    kept: List[Tuple[FrozenSet[str], FrozenSet[str], BrainstormQuestionGroup, int]] = []
+    for question_set in question_sets:
+        for group in question_set.question_groups:
+            words = frozenset(normalize(group.heading).split())
+            target = next((g for w, g in groups if jaccard(words, w) >= heading_threshold), None)
+            if target is None:
+                target = BrainstormQuestionGroup(heading=group.heading, questions=[])
+                groups.append((words, target))
+            for question in group.questions:
+                summary = shingles(question.short_summary)
+                description = shingles(question.full_description)
+                match = next((
+                    k for k in kept
+                    if jaccard(summary, k[0]) >= threshold and jaccard(description, k[1]) >= threshold
+                ), None)
+                if match is None:
+                    target.questions.append(question)
+                    kept.append((summary, description, target, len(target.questions) - 1))
+                    continue
+                _, _, owner, index = match
+                if len(question.full_description) > len(owner.questions[index].full_description):
+                    owner.questions[index] = question
+    return BrainstormQuestions(question_groups=[group for _, group in groups if group.questions])
+
+def similarity_matrix(texts: List[str], k: int = 4) -> np.ndarray:
+    """Pairwise Jaccard similarity of the texts' character shingles"""
+    vocabulary: Dict[str, int] = {}
+    rows = [[vocabulary.setdefault(s, len(vocabulary)) for s in shingles(text, k)] for text in texts]
+    matrix = np.zeros((len(texts), max(1, len(vocabulary))), dtype=np.float32)
+    for i, columns in enumerate(rows):
+        matrix[i, columns] = 1.0
+    intersection = matrix @ matrix.T
+    sizes = matrix.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.ones_like(intersection), where=union > 0)
+
+def cluster_answers(
+    all_responses: List[List[BrainstormResponse]],
+    threshold: float = 0.85
+) -> List[Tuple[str, List[Tuple[str, List[int]]]]]:
+    """Collapse every participant's near-verbatim answers per question
+
+    Answers are grouped by normalized question text, in first-seen order. Each
+    unassigned answer starts a cluster that takes every remaining answer at
+    least ``threshold`` similar to it; the cluster is returned as its longest
+    member with the zero-based indices of every participant in it. Character
+    shingles cannot tell "local farms" from "local schools", so the threshold
+    should stay high enough that only rewordings of one answer are collapsed.
+    """
+    questions: Dict[str, Tuple[str, List[Tuple[int, str]]]] = {}
+    for participant, responses in enumerate(all_responses):
+        for response in responses:
+            entry = questions.setdefault(normalize(response.question), (response.question, []))
+            entry[1].extend((participant, answer) for answer in response.answers)
+
+    result = []
+    for question, answers in questions.values():
+        similarity = similarity_matrix([answer for _, answer in answers])
+        unassigned = np.ones(len(answers), dtype=bool)
+        clusters = []
+        for i in range(len(answers)):
+            if not unassigned[i]:
+                continue
+            members = np.flatnonzero(unassigned & (similarity[i] >= threshold))
+            unassigned[members] = False
+            representative = max((answers[m][1] for m in members), key=len)
+            clusters.append((representative, sorted({answers[m][0] for m in members})))
+        result.append((question, clusters))
+    return result
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+# Roughly four characters per token for English prose
+CHARS_PER_TOKEN = 4
+
+def split_document(text: str, max_tokens: int = 4000) -> List[str]:
+    """Split a document into sections of at most ``max_tokens`` (estimated)
+
+    Splits prefer markdown headings, then blank-line paragraph breaks, then
+    sentence ends, and only cut mid-sentence for text with no boundaries.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+    sections: List[str] = []
+    current = ""
+    for block in _blocks(text, max_chars):
+        if current and len(current) + len(block) + 2 > max_chars:
+            sections.append(current)
+            current = block
+        else:
+            current = f"{current}\n\n{block}" if current else block
+    if current:
+        sections.append(current)
+    return sections
+
+def _blocks(text: str, max_chars: int) -> List[str]:
+    """Paragraphs (headings start their own block), each no longer than max_chars"""
+    blocks = []
+    for paragraph in re.split(r"\n\s*\n|\n(?=#{1,6} )", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            blocks.append(paragraph)
+            continue
+        piece = ""
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                blocks.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if piece and len(piece) + len(sentence) + 1 > max_chars:
+                blocks.append(piece)
+                piece = sentence
+            else:
+                piece = f"{piece} {sentence}" if piece else sentence
+        if piece:
+            blocks.append(piece)
+    return blocks
+
+class DocumentNotFoundError(KeyError):
+    """Raised when a document id does not refer to a stored upload"""
+    def __str__(self) -> str:
+        # KeyError would otherwise render the bare, quoted id
+        return f"Document not found: {self.args[0]}"
+
+class DocumentTooLargeError(ValueError):
+    """Raised when an upload exceeds the store's size limit"""
+
+class DocumentStore:
+    """Uploaded documents on local disk, addressed by a hash of their content
+
+    Uploads are copied in fixed-size chunks so a large file is never held in
+    memory as a whole; it is only decoded when a context is built from it.
+    Uploading the same file again reuses the stored copy. Documents not
+    uploaded or read for ``ttl`` seconds are dropped, then the least recently
+    used ones while the directory holds more than ``max_total_bytes``; None
+    disables either limit.
+    """
+    CHUNK_BYTES = 1024 * 1024
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 20 * 1024 * 1024,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_total_bytes: Optional[int] = 1024 * 1024 * 1024
+    ):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "idea-symphony-documents")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_total_bytes = max_total_bytes
+        self._saves_since_evict = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._evict()
+
+    def path(self, document_id: str) -> str:
+        if not re.fullmatch(r"[0-9a-f]{32}", document_id):
+            raise DocumentNotFoundError(document_id)
+        return os.path.join(self.directory, f"{document_id}.txt")
+
+    async def save(self, upload) -> Tuple[str, int]:
+        """Copy an async file-like upload (e.g. Starlette's UploadFile) to disk; returns (id, size)"""
+        digest = hashlib.sha256()
+        # Unique per upload, so identical files uploaded at once do not share a partial file
+        partial = os.path.join(self.directory, f"{uuid.uuid4().hex}.part")
+        size = 0
+        f = await asyncio.to_thread(open, partial, "wb")
+        try:
+            while chunk := await upload.read(self.CHUNK_BYTES):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise DocumentTooLargeError(f"Document exceeds {self.max_bytes} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            f.close()
+            os.remove(partial)
+            raise
+        f.close()
+        document_id = digest.hexdigest()[:32]
+        path = self.path(document_id)
+        if os.path.exists(path):
+            os.remove(partial)
+            os.utime(path)
+        else:
+            os.replace(partial, path)
+        self._saves_since_evict += 1
+        if self._saves_since_evict >= 50:
+            await asyncio.to_thread(self._evict)
+        return document_id, size
+
+    def _evict(self):
+        """Drop expired documents and stale partial uploads, then the least recently used over the size budget"""
+        self._saves_since_evict = 0
+        documents = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                self._remove(entry.path)
+            elif entry.name.endswith(".txt"):
+                documents.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in documents)
+        for _, size, path in sorted(documents):
+            if self.max_total_bytes is None or total <= self.max_total_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def read(self, document_id: str) -> str:
+        path = self.path(document_id)
+        try:
+            with open(path, "rb") as f:
+                data = await asyncio.to_thread(f.read)
+        except FileNotFoundError:
+            raise DocumentNotFoundError(document_id) from None
+        # Reading counts as use, so documents of active sessions are not pruned
+        os.utime(path)
+        return data.decode("utf-8", errors="replace")
+
+    def delete(self, document_id: str) -> bool:
+        try:
+            os.remove(self.path(document_id))
+            return True
+        except (DocumentNotFoundError, FileNotFoundError):
+            return False
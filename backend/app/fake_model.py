@@ -0,0 +1,137 @@
+import asyncio
+import json
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+WORDS = (
+    "idea plan user launch budget team partner market story theme guest event design "
+    "schedule venue risk feedback prototype audience channel goal metric cost timeline "
+    "feature support content brand community workshop pilot survey reward activity"
+).split()
+
+def schema_name(schema: Dict[str, Any]) -> str:
+    """Name of the output type an output tool schema describes, e.g. BrainstormQuestions or List[BrainstormResponse]"""
+    if "title" in schema:
+        return schema["title"]
+    items = schema.get("properties", {}).get("response", {}).get("items", {})
+    return f"List[{items.get('$ref', '').rsplit('/', 1)[-1]}]"
+
+class FakeOutputGenerator:
+    """Builds schema-valid tool arguments from a JSON schema"""
+    def __init__(self, rng: random.Random, text_words: int = 12):
+        self.rng = rng
+        self.text_words = text_words
+
+    def sentence(self, words: int) -> str:
+        text = " ".join(self.rng.choice(WORDS) for _ in range(max(1, words)))
+        return text[0].upper() + text[1:] + "."
+
+    def generate(self, schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None, field: str = "") -> Any:
+        defs = defs if defs is not None else schema.get("$defs", {})
+        if "$ref" in schema:
+            return self.generate(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, field)
+        if "anyOf" in schema:
+            options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+            return self.generate(options[0], defs, field) if options else None
+        kind = schema.get("type")
+        if kind == "object":
+            return {
+                name: self.generate(prop, defs, name)
+                for name, prop in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            count = max(schema.get("minItems", 0), self.rng.randint(2, 4))
+            return [self.generate(schema.get("items", {}), defs, field) for _ in range(count)]
+        if kind == "integer":
+            return self.rng.randint(0, 100)
+        if kind == "number":
+            return round(self.rng.random() * 100, 2)
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        # Long-form fields (context, synthesized_content, ...) get several paragraphs of markdown
+        if "content" in field or field == "context":
+            paragraphs = [self.sentence(self.text_words) + " " + self.sentence(self.text_words) for _ in range(3)]
+            return "## " + self.sentence(3)[:-1] + "\n\n" + "\n\n".join(paragraphs)
+        return self.sentence(self.rng.randint(self.text_words // 2, self.text_words))
+
+def build_fake_model(
+    latency: str = "fixed",
+    latency_mean: float = 0.0,
+    latency_sigma: float = 0.5,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed: Optional[int] = None,
+    fixtures: Optional[Dict[str, Any]] = None,
+    text_words: int = 12
+) -> FunctionModel:
+    """A stand-in model that returns schema-valid outputs after a simulated delay
+
+    ``latency`` is one of ``fixed`` (always ``latency_mean`` seconds),
+    ``uniform`` (0 to twice the mean) or ``lognormal`` (median ``latency_mean``,
+    shape ``latency_sigma``). A fraction ``error_rate`` of calls fail with a
+    ModelHTTPError carrying ``error_status``. ``fixtures`` maps an output type
+    name (see ``schema_name``, or ``str`` for plain-text outputs) to canned
+    tool arguments, or to a callable that receives the random generator and
+    returns them.
+    """
+    rng = random.Random(seed)
+    generator = FakeOutputGenerator(rng, text_words)
+    fixtures = fixtures or {}
+
+    def delay() -> float:
+        if latency == "uniform":
+            return rng.uniform(0, 2 * latency_mean)
+        if latency == "lognormal" and latency_mean > 0:
+            return rng.lognormvariate(0, latency_sigma) * latency_mean
+        return latency_mean
+
+    def output_args(info: AgentInfo) -> Dict[str, Any]:
+        tool = info.output_tools[0]
+        name = schema_name(tool.parameters_json_schema)
+        fixture = fixtures.get(name)
+        if fixture is None:
+            return generator.generate(tool.parameters_json_schema)
+        args = fixture(rng) if callable(fixture) else fixture
+        # List outputs are wrapped by pydantic_ai in a single "response" property
+        if name.startswith("List["):
+            args = {"response": args}
+        return args
+
+    async def simulate():
+        await asyncio.sleep(delay())
+        if error_rate and rng.random() < error_rate:
+            raise ModelHTTPError(status_code=error_status, model_name="fake", body="Simulated provider error")
+
+    def output_text() -> str:
+        fixture = fixtures.get("str")
+        if fixture is None:
+            return generator.generate({"type": "string"}, field="content")
+        return fixture(rng) if callable(fixture) else fixture
+
+    async def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await simulate()
+        # Plain str outputs have no output tool and are answered with text
+        if not info.output_tools:
+            return ModelResponse(parts=[TextPart(output_text())])
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, output_args(info))])
+
+    async def stream(messages: List[ModelMessage], info: AgentInfo) -> AsyncIterator[Union[str, Dict[int, DeltaToolCall]]]:
+        await simulate()
+        if not info.output_tools:
+            text = output_text()
+            step = max(1, len(text) // 20)
+            for start in range(0, len(text), step):
+                await asyncio.sleep(0)
+                yield text[start:start + step]
+            return
+        args = json.dumps(output_args(info))
+        yield {0: DeltaToolCall(name=info.output_tools[0].name)}
+        step = max(1, len(args) // 20)
+        for start in range(0, len(args), step):
+            await asyncio.sleep(0)
+            yield {0: DeltaToolCall(json_args=args[start:start + step])}
+
+    return FunctionModel(respond, stream_function=stream, model_name="fake")
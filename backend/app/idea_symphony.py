@@ -1,18 +1,122 @@
-from typing import List, Dict, Any
-from pydantic_ai import Agent, format_as_xml
+import asyncio
+import uuid
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple
 from shared.models import (
     IdeaInput, BrainstormingContext, BrainstormQuestions,
-    BrainstormResponse, BrainstormSynthesis
+    BrainstormResponse, BrainstormSynthesis, BrainstormChunkResult,
+    SynthesisProgress, SessionRequest, SessionResult, SessionIndex,
+    BatchRequest, BatchItemResult
 )
+from shared.stages import chunk_questions
+from .agents import AgentRegistry
+from .cache import ResponseCache, output_adapter, output_schema, model_name
+from .dedup import cluster_answers, merge_question_sets
+from .documents import DocumentStore, split_document
+from .metrics import Metrics, timed_stage
+from .profiling import phase
+from .scheduler import ProviderScheduler, INTERACTIVE, BULK, current_session, priority_override
+from .sessions import SessionStore, unit_fingerprint
+
+# Stages a user is actively waiting on jump ahead of bulk brainstorming in the scheduler
+STAGE_PRIORITIES = {
+    "context": INTERACTIVE,
+    "document_distiller": INTERACTIVE,
+    "question_generator": INTERACTIVE,
+    "question_synthesizer": INTERACTIVE,
+    "brainstorming": BULK,
+    "synthesis": INTERACTIVE,
+    "topic_synthesis": INTERACTIVE,
+    "synthesis_merge": INTERACTIVE,
+}
+
+def stage_priority(stage: str) -> int:
+    """Scheduler priority of a stage's agent calls, unless overridden for the current context"""
+    override = priority_override.get()
+    return STAGE_PRIORITIES[stage] if override is None else override
+
+def estimate_tokens(*texts: Any) -> int:
+    """Rough token count (about four characters per token) used for rate limiting"""
+    return sum(len(str(text)) for text in texts) // 4
+
+def format_as_xml(obj: Any) -> str:
+    """pydantic_ai's format_as_xml, imported on first use to keep pydantic_ai out of startup"""
+    from pydantic_ai import format_as_xml
+    with phase("prompt"):
+        return format_as_xml(obj)
+
+def usage_tokens(result: Any) -> Optional[int]:
+    """Total tokens reported by a run result, if the model reports usage"""
+    usage = result.usage
+    # usage is a method on older pydantic_ai results and a property on newer ones
+    if callable(usage):
+        usage = usage()
+    return getattr(usage, "total_tokens", None)
 
 class IdeaSymphony:
-    def __init__(self):
-        # Store only agent configurations, not Agent instances
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        question_models: Optional[List[str]] = None,
+        question_timeout: Optional[float] = 120.0,
+        cache: Optional[ResponseCache] = None,
+        scheduler: Optional[ProviderScheduler] = None,
+        hierarchical_synthesis_threshold: int = 100,
+        large_document_threshold: int = 40_000,
+        document_section_tokens: int = 4000,
+        documents: Optional[DocumentStore] = None,
+        question_merge: str = "auto",
+        local_question_limit: int = 40,
+        question_similarity: float = 0.85,
+        answer_similarity: Optional[float] = 0.85,
+        sessions: Optional[SessionStore] = None,
+        metrics: Optional[Metrics] = None,
+        batch_concurrency: int = 4
+    ):
+        # Global cap on in-flight agent calls shared by every session, enforced by the scheduler
+        self.max_concurrency = max_concurrency
+        # Question generation slot i uses question_models[i % len(question_models)]
+        self.question_models = question_models or ['google-gla:gemini-2.5-flash-preview-04-17']
+        self.question_timeout = question_timeout
+        # Opt-in cache of agent outputs keyed by stage, model, prompts and output schema
+        self.cache = cache
+        # Every agent call waits for a scheduler slot; rates are unlimited unless configured
+        self.scheduler = scheduler or ProviderScheduler(max_in_flight=max_concurrency)
+        # Above this many answers, "auto" synthesis maps per topic and then merges
+        self.hierarchical_synthesis_threshold = hierarchical_synthesis_threshold
+        # Documents longer than this many characters are distilled section by section first
+        self.large_document_threshold = large_document_threshold
+        self.document_section_tokens = document_section_tokens
+        self.documents = documents
+        # How question sets are merged: "llm", "prefilter" (dedupe locally, then LLM) or
+        # "auto" (local only when at most local_question_limit questions remain)
+        self.question_merge = question_merge
+        self.local_question_limit = local_question_limit
+        self.question_similarity = question_similarity
+        # Near-duplicate answers are grouped before synthesis (identical ones listed once); None sends every answer verbatim
+        self.answer_similarity = answer_similarity
+        # Checkpoints of stage outputs and brainstorm units, used to resume sessions
+        self.sessions = sessions
+        # Latency, token and outcome metrics for every stage and agent call
+        self.metrics = metrics or Metrics()
+        # Ideas of a batch run at once unless the batch asks for fewer or more
+        self.batch_concurrency = batch_concurrency
+
+        # Per-stage agent configurations; instances live in self.agents
         self.context_agent_config = {
             "model": 'google-gla:gemini-2.5-flash-preview-04-17',
             "output_type": BrainstormingContext,
             "system_prompt": "You are an expert at distilling information into clear, concise context documents."
         }
+        self.document_distiller_agent_config = {
+            "model": 'google-gla:gemini-2.5-flash-preview-04-17',
+            "output_type": str,
+            "system_prompt": """
+            You are an expert at distilling long documents.
+            You will receive an idea and one section of a supporting document.
+            Extract the facts, goals, constraints, open questions and decisions in the section that matter for the idea.
+            Respond with concise markdown notes only.
+            """
+        }
         self.question_generator_agent_config = {
             "model": 'google-gla:gemini-2.5-flash-preview-04-17',
             "output_type": BrainstormQuestions,
@@ -52,89 +156,365 @@ class IdeaSymphony:
             Aggregate similar ideas while preserving unique insights.
             Create both an attributed version (showing which participant generated which idea)
             and a clean, non-attributed version for a more streamlined reading experience.
+            Answers may end with the participants who gave them, e.g. (P1, P3) for Participants 1 and 3; use these for attribution.
+            """
+        }
+        self.topic_synthesis_agent_config = {
+            "model": 'google-gla:gemini-2.5-flash-preview-04-17',
+            "output_type": BrainstormSynthesis,
+            "system_prompt": """
+            You are an expert facilitator who synthesizes one topic of a brainstorming session.
+            Take multiple participant responses to the questions on this topic and synthesize them.
+            Aggregate similar ideas while preserving unique insights.
+            Create both an attributed version (showing which participant generated which idea)
+            and a clean, non-attributed version.
+            Answers may end with the participants who gave them, e.g. (P1, P3) for Participants 1 and 3; use these for attribution.
+            """
+        }
+        self.synthesis_merge_agent_config = {
+            "model": 'google-gla:gemini-2.5-flash-preview-04-17',
+            "output_type": BrainstormSynthesis,
+            "system_prompt": """
+            You are an expert facilitator who assembles a brainstorming session report.
+            You will receive syntheses of individual topics, each with an attributed and a clean version.
+            Merge them into one cohesive document with a section per topic, removing repetition across topics.
+            Keep every participant attribution from the attributed versions in the attributed document,
+            and produce a clean, non-attributed document for a more streamlined reading experience.
             """
         }
+        # Agents are built lazily from these configs and reused across requests
+        self.agents = AgentRegistry({
+            "context": self.context_agent_config,
+            "document_distiller": self.document_distiller_agent_config,
+            "question_generator": self.question_generator_agent_config,
+            "question_synthesizer": self.question_synthesizer_agent_config,
+            "brainstorming": self.brainstorming_agent_config,
+            "synthesis": self.synthesis_agent_config,
+            "topic_synthesis": self.topic_synthesis_agent_config,
+            "synthesis_merge": self.synthesis_merge_agent_config,
+        })
+
+    def use_model(self, model: Any):
+        """Point every stage at one model, e.g. a fake model for offline benchmarking"""
+        for config in self.agents.configs.values():
+            config["model"] = model
+        self.question_models = [model]
+        self.agents.clear()
+
+    async def _run_agent(
+        self, stage: str, prompt: str, model: Optional[Any] = None, timeout: Optional[float] = None
+    ) -> Any:
+        """Run a stage's agent, serving identical requests from the cache when enabled
+
+        ``timeout`` bounds the model call itself, not the time spent queued for a scheduler slot.
+        """
+        config = self.agents.configs[stage]
+        model = model or config["model"]
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(
+                stage, model_name(model), config["system_prompt"], prompt, output_schema(config["output_type"])
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.cache_hit(stage)
+                return output_adapter(config["output_type"]).validate_json(cached)
+        agent = self.agents.get(stage, model)
+        async with self.scheduler.slot(
+            model_name(model), stage_priority(stage), estimate_tokens(config["system_prompt"], prompt)
+        ) as usage:
+            with self.metrics.agent_call(stage, model_name(model)) as call, phase("model"):
+                result = await asyncio.wait_for(agent.run(prompt), timeout)
+                call.record(result)
+            usage["tokens"] = usage_tokens(result)
+        if key is not None:
+            self.cache.set(key, output_adapter(config["output_type"]).dump_json(result.output).decode(), stage)
+        return result.output
+
+    async def _stream_agent(self, stage: str, prompt: str, model: Optional[Any] = None) -> AsyncIterator[Any]:
+        """Stream partial outputs of a stage's agent; the last item is the final validated output"""
+        config = self.agents.configs[stage]
+        model = model or config["model"]
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(
+                stage, model_name(model), config["system_prompt"], prompt, output_schema(config["output_type"])
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.cache_hit(stage)
+                yield output_adapter(config["output_type"]).validate_json(cached)
+                return
+        agent = self.agents.get(stage, model)
+        async with self.scheduler.slot(
+            model_name(model), stage_priority(stage), estimate_tokens(config["system_prompt"], prompt)
+        ) as usage:
+            with self.metrics.agent_call(stage, model_name(model)) as call, phase("model"):
+                async with agent.run_stream(prompt) as result:
+                    async for partial in result.stream_output(debounce_by=0.1):
+                        yield partial
+                    output = await result.get_output()
+                call.record(result)
+            usage["tokens"] = usage_tokens(result)
+        if key is not None:
+            self.cache.set(key, output_adapter(config["output_type"]).dump_json(output).decode(), stage)
+        yield output
+
+    async def _distill_document(self, idea_text: str, document: str) -> str:
+        """Map-reduce a long document into notes short enough for a single context call
+
+        Sections are distilled concurrently; if the combined notes are still too
+        long they are split and distilled again (at most three rounds).
+        """
+        for _ in range(3):
+            if len(document) <= self.large_document_threshold:
+                break
+            sections = split_document(document, self.document_section_tokens)
+            notes = await asyncio.gather(*(
+                self._run_agent(
+                    "document_distiller",
+                    format_as_xml({
+                        "idea": idea_text,
+                        "section": f"{i + 1} of {len(sections)}",
+                        "document_section": section
+                    })
+                )
+                for i, section in enumerate(sections)
+            ))
+            document = "\n\n".join(
+                f"## Section {i + 1} notes\n\n{note}" for i, note in enumerate(notes)
+            )
+        return document
 
+    @timed_stage("create_context")
     async def create_context(self, idea_input: IdeaInput) -> BrainstormingContext:
-        """Generate a distilled context document from the user's input"""
+        """Generate a distilled context document from the user's input
+
+        Uploaded documents referenced by ``document_id`` are loaded from the
+        document store. Documents above ``large_document_threshold`` characters
+        are first distilled section by section; shorter ones go straight into
+        one call.
+        """
+        document = idea_input.document_content
+        if not document and idea_input.document_id and self.documents is not None:
+            document = await self.documents.read(idea_input.document_id)
+        if document and len(document) > self.large_document_threshold:
+            document = await self._distill_document(idea_input.idea_text, document)
         prompt = format_as_xml({
             "idea": idea_input.idea_text,
-            "document": idea_input.document_content or "No additional document provided"
+            "document": document or "No additional document provided"
         })
-        agent = Agent(**self.context_agent_config)
-        result = await agent.run(
+        return await self._run_agent(
+            "context",
             f"Please distill the following information into a clear, concise context document for brainstorming: {prompt}"
         )
-        return result.output
 
+    async def _generate_question_set(self, context: BrainstormingContext, slot: int) -> BrainstormQuestions:
+        """Generate one question set using the model assigned to this slot"""
+        model = self.question_models[slot % len(self.question_models)]
+        return await self._run_agent(
+            "question_generator",
+            f"Review this project information and generate {5+slot*2}-{8+slot*3} brainstorming questions to help develop it further: {context.context}",
+            model,
+            timeout=self.question_timeout
+        )
+
+    @timed_stage("generate_questions")
     async def generate_questions(self, context: BrainstormingContext, model_count: int = 1) -> List[BrainstormQuestions]:
-        """Generate questions from multiple models"""
-        question_sets = []
-        for i in range(model_count):
-            agent = Agent(**self.question_generator_agent_config)
-            result = await agent.run(
-                f"Review this project information and generate {5+i*2}-{8+i*3} brainstorming questions to help develop it further: {context.context}"
-            )
-            question_sets.append(result.output)
+        """Generate questions from multiple models concurrently
+
+        Slots that fail or time out are dropped as long as at least one set is
+        produced; if every slot fails the first error is raised.
+        """
+        results = await asyncio.gather(
+            *(self._generate_question_set(context, i) for i in range(model_count)),
+            return_exceptions=True
+        )
+        question_sets = [r for r in results if not isinstance(r, BaseException)]
+        if not question_sets:
+            raise results[0]
         return question_sets
 
-    async def synthesize_questions(self, question_sets: List[BrainstormQuestions]) -> BrainstormQuestions:
-        """Synthesize multiple sets of questions into one cohesive set"""
+    @timed_stage("synthesize_questions")
+    async def synthesize_questions(
+        self,
+        question_sets: List[BrainstormQuestions],
+        mode: Optional[str] = None
+    ) -> BrainstormQuestions:
+        """Synthesize multiple sets of questions into one cohesive set
+
+        ``mode`` (default ``self.question_merge``) is ``llm`` to send every set
+        to the synthesizer, ``prefilter`` to merge near-duplicates locally and
+        send only the merged set, or ``auto`` to skip the synthesizer entirely
+        when the merged set has at most ``local_question_limit`` questions.
+        """
+        mode = mode or self.question_merge
+        if mode not in ("llm", "prefilter", "auto"):
+            raise ValueError(f"Unknown question merge mode: {mode}")
         if len(question_sets) == 1:
             return question_sets[0]
+        if mode != "llm":
+            merged = merge_question_sets(question_sets, self.question_similarity)
+            question_count = sum(len(group.questions) for group in merged.question_groups)
+            if mode == "auto" and question_count <= self.local_question_limit:
+                return merged
+            question_sets = [merged]
         formatted_sets = [format_as_xml(qs) for qs in question_sets]
         combined = "\n\n".join([f"Question Set {i+1}:\n{set_text}" for i, set_text in enumerate(formatted_sets)])
-        agent = Agent(**self.question_synthesizer_agent_config)
-        result = await agent.run(
+        return await self._run_agent(
+            "question_synthesizer",
             f"Synthesize these sets of questions into a single comprehensive list, eliminating duplication: {combined}"
         )
-        return result.output
 
+    @timed_stage("chunk_questions")
     async def chunk_questions(self, questions: BrainstormQuestions) -> List[Dict[str, Any]]:
         """Group questions by topic area for more efficient processing"""
-        chunks = []
-        for group in questions.question_groups:
-            chunk = {
-                "heading": group.heading,
-                "questions": []
-            }
-            for question in group.questions:
-                chunk["questions"].append({
-                    "short_summary": question.short_summary,
-                    "full_description": question.full_description
-                })
-            chunks.append(chunk)
-        return chunks
+        return chunk_questions(questions)
+
+    async def _brainstorm_chunk(
+        self,
+        context: BrainstormingContext,
+        chunk: Dict[str, Any],
+        participant: int,
+        session_semaphore: asyncio.Semaphore
+    ) -> List[BrainstormResponse]:
+        """Answer one question chunk as one participant"""
+        prompt = format_as_xml({
+            "context": context.context,
+            "topic": chunk["heading"],
+            "questions": chunk["questions"]
+        })
+        async with session_semaphore:
+            return await self._run_agent(
+                "brainstorming",
+                f"You are Participant {participant + 1}. Please answer the following brainstorming questions "
+                f"for this project. For each question, provide 3-5 unique responses:\n\n{prompt}"
+            )
+
+    @timed_stage("brainstorm")
+    async def stream_brainstorm_responses(
+        self,
+        context: BrainstormingContext,
+        question_chunks: List[Dict[str, Any]],
+        participant_count: int = 2,
+        max_concurrency: Optional[int] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[BrainstormChunkResult]:
+        """Yield each (participant, chunk) result as soon as it completes
+
+        Every unit is scheduled at once; ``max_concurrency`` bounds this session,
+        while the instance-wide limit bounds all sessions. Closing the iterator
+        early cancels the units that are still running. With a ``session_id``
+        and a session store, units checkpointed earlier for the same context
+        and questions are yielded first and only the rest are generated.
+        """
+        session_semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        checkpoint = self.sessions is not None and session_id is not None
+        stored: Dict[Tuple[int, int], Any] = {}
+        if checkpoint:
+            fingerprint = unit_fingerprint(context, question_chunks)
+            stored = self.sessions.units(session_id, fingerprint)
+        total = participant_count * len(question_chunks)
+        completed = 0
+        for (participant, chunk_index), responses in sorted(stored.items()):
+            if participant >= participant_count or chunk_index >= len(question_chunks):
+                continue
+            completed += 1
+            result = BrainstormChunkResult(
+                participant=participant,
+                chunk_index=chunk_index,
+                heading=question_chunks[chunk_index]["heading"],
+                responses=responses,
+                completed=completed,
+                total=total
+            )
+            # Units checkpointed before responses carried their chunk
+            for response in result.responses:
+                response.chunk_index = chunk_index
+            yield result
+
+        async def unit(participant: int, chunk_index: int):
+            chunk = question_chunks[chunk_index]
+            responses = await self._brainstorm_chunk(context, chunk, participant, session_semaphore)
+            # Synthesis groups by chunk, whatever wording the model gave the question
+            for response in responses:
+                response.chunk_index = chunk_index
+            return participant, chunk_index, responses
+
+        tasks = [
+            asyncio.ensure_future(unit(participant, chunk_index))
+            for participant in range(participant_count)
+            for chunk_index in range(len(question_chunks))
+            if (participant, chunk_index) not in stored
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                participant, chunk_index, responses = await next_done
+                if checkpoint:
+                    self.sessions.save_unit(session_id, fingerprint, participant, chunk_index, responses)
+                completed += 1
+                yield BrainstormChunkResult(
+                    participant=participant,
+                    chunk_index=chunk_index,
+                    heading=question_chunks[chunk_index]["heading"],
+                    responses=responses,
+                    completed=completed,
+                    total=total
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def brainstorm_responses(
         self, 
         context: BrainstormingContext, 
         question_chunks: List[Dict[str, Any]], 
-        participant_count: int = 2
+        participant_count: int = 2,
+        max_concurrency: Optional[int] = None,
+        session_id: Optional[str] = None
     ) -> List[List[BrainstormResponse]]:
-        """Generate brainstorming responses from multiple participants"""
-        all_participant_responses = []
-        for participant in range(participant_count):
-            participant_responses = []
-            for chunk in question_chunks:
-                prompt = format_as_xml({
-                    "context": context.context,
-                    "topic": chunk["heading"],
-                    "questions": chunk["questions"]
-                })
-                agent = Agent(**self.brainstorming_agent_config)
-                result = await agent.run(
-                    f"You are Participant {participant + 1}. Please answer the following brainstorming questions "
-                    f"for this project. For each question, provide 3-5 unique responses:\n\n{prompt}"
-                )
-                participant_responses.extend(result.output)
-            all_participant_responses.append(participant_responses)
-        return all_participant_responses
+        """Generate brainstorming responses from multiple participants
+
+        Runs the units concurrently (see ``stream_brainstorm_responses``) and
+        returns them participant-major, chunk-minor. Pass ``max_concurrency=1``
+        for the old serial behaviour.
+        """
+        grid: List[List[List[BrainstormResponse]]] = [
+            [[] for _ in question_chunks] for _ in range(participant_count)
+        ]
+        async for result in self.stream_brainstorm_responses(
+            context, question_chunks, participant_count, max_concurrency, session_id
+        ):
+            grid[result.participant][result.chunk_index] = result.responses
+        return [
+            [response for chunk_responses in participant_chunks for response in chunk_responses]
+            for participant_chunks in grid
+        ]
 
-    async def synthesize_responses(self, all_responses: List[List[BrainstormResponse]]) -> BrainstormSynthesis:
-        """Synthesize all brainstorming responses into a final document"""
+    def _format_responses(self, all_responses: List[List[BrainstormResponse]]) -> str:
+        """Render responses as markdown for a synthesis prompt, clustered unless disabled"""
+        with phase("prompt"):
+            if self.answer_similarity is None:
+                return self._format_by_participant(all_responses)
+            return self._format_clusters(all_responses)
+
+    def _format_clusters(self, all_responses: List[List[BrainstormResponse]]) -> str:
+        """One section per question; near-verbatim answers are listed once with every participant who gave them"""
+        sections = []
+        for question, clusters in cluster_answers(all_responses, self.answer_similarity):
+            lines = [f"### {question}\n"]
+            for answer, participants in clusters:
+                labels = ", ".join(f"P{p + 1}" for p in participants)
+                lines.append(f"- {answer} ({labels})")
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
+
+    def _format_by_participant(self, all_responses: List[List[BrainstormResponse]]) -> str:
+        """Render responses as markdown, one section per participant"""
         formatted_responses = []
         for i, participant_responses in enumerate(all_responses):
+            if not participant_responses:
+                continue
             participant_text = f"## Participant {i+1} Responses\n\n"
             for response in participant_responses:
                 participant_text += f"### {response.question}\n\n"
@@ -142,10 +522,248 @@ class IdeaSymphony:
                     participant_text += f"- {answer}\n"
                 participant_text += "\n"
             formatted_responses.append(participant_text)
-        combined_responses = "\n\n".join(formatted_responses)
-        agent = Agent(**self.synthesis_agent_config)
-        result = await agent.run(
+        return "\n\n".join(formatted_responses)
+
+    def _synthesis_prompt(self, all_responses: List[List[BrainstormResponse]]) -> str:
+        """Render every participant's responses into the single-call synthesis prompt"""
+        return (
             f"Synthesize these brainstorming responses into a cohesive document that preserves unique insights "
-            f"while aggregating similar ideas:\n\n{combined_responses}"
+            f"while aggregating similar ideas:\n\n{self._format_responses(all_responses)}"
         )
-        return result.output
+
+    def _group_by_topic(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: List[Dict[str, Any]]
+    ) -> List[Tuple[str, List[List[BrainstormResponse]]]]:
+        """Split each participant's responses by the heading of the chunk they answer
+
+        Responses are placed by their ``chunk_index``; those without one (e.g.
+        human responses) by matching their question to a chunk's summary.
+        Participant positions are kept (possibly empty) so numbering stays
+        stable across topics; responses matching no chunk go to "Other".
+        """
+        index = SessionIndex.from_chunks(question_chunks)
+        headings = index.topics + ["Other"]
+        grouped = {heading: [[] for _ in all_responses] for heading in headings}
+        for i, participant_responses in enumerate(all_responses):
+            for response in participant_responses:
+                if response.chunk_index is not None and response.chunk_index < len(question_chunks):
+                    heading = question_chunks[response.chunk_index]["heading"]
+                else:
+                    heading = index.topic_for(response.question) or "Other"
+                grouped[heading][i].append(response)
+        return [
+            (heading, grouped[heading]) for heading in headings
+            if any(grouped[heading])
+        ]
+
+    def _use_hierarchical_synthesis(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]],
+        mode: str
+    ) -> bool:
+        if mode == "single" or not question_chunks or len(question_chunks) < 2:
+            return False
+        if mode == "hierarchical":
+            return True
+        answer_count = sum(len(r.answers) for participant in all_responses for r in participant)
+        return answer_count > self.hierarchical_synthesis_threshold
+
+    async def _prepare_synthesis(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]],
+        mode: str
+    ) -> Tuple[str, str]:
+        """Return the final synthesis stage and its prompt, running the per-topic map step if needed"""
+        if not self._use_hierarchical_synthesis(all_responses, question_chunks, mode):
+            return "synthesis", self._synthesis_prompt(all_responses)
+        topics = self._group_by_topic(all_responses, question_chunks)
+        if len(topics) <= 1:
+            # One topic would only add a merge call to the single synthesis
+            return "synthesis", self._synthesis_prompt(all_responses)
+        topic_syntheses = await asyncio.gather(*(
+            self._run_agent(
+                "topic_synthesis",
+                f"Synthesize these brainstorming responses on the topic \"{heading}\", preserving unique "
+                f"insights while aggregating similar ideas:\n\n{self._format_responses(responses)}"
+            )
+            for heading, responses in topics
+        ))
+        sections = []
+        for (heading, _), synthesis in zip(topics, topic_syntheses):
+            sections.append(
+                f"## Topic: {heading}\n\n### Attributed\n\n{synthesis.attributed_content or ''}\n\n"
+                f"### Clean\n\n{synthesis.synthesized_content}"
+            )
+        return "synthesis_merge", (
+            "Merge these per-topic syntheses into a single cohesive brainstorming report:\n\n"
+            + "\n\n".join(sections)
+        )
+
+    @timed_stage("synthesize")
+    async def synthesize_responses(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]] = None,
+        mode: str = "auto"
+    ) -> BrainstormSynthesis:
+        """Synthesize all brainstorming responses into a final document
+
+        ``mode`` is ``single`` (one agent call over everything), ``hierarchical``
+        (synthesize each question chunk's topic in parallel, then merge) or
+        ``auto``, which goes hierarchical above ``hierarchical_synthesis_threshold``
+        answers. Hierarchical synthesis needs ``question_chunks``.
+        """
+        stage, prompt = await self._prepare_synthesis(all_responses, question_chunks, mode)
+        return await self._run_agent(stage, prompt)
+
+    @timed_stage("synthesize")
+    async def stream_synthesize_responses(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]] = None,
+        mode: str = "auto"
+    ) -> AsyncIterator[SynthesisProgress]:
+        """Stream the final synthesis as it is generated, ending with the validated result"""
+        stage, prompt = await self._prepare_synthesis(all_responses, question_chunks, mode)
+        # Hold each item back by one so the final output is only sent once, marked done
+        previous = None
+        async for output in self._stream_agent(stage, prompt):
+            if previous is not None:
+                yield SynthesisProgress(synthesis=previous, done=False)
+            previous = output
+        yield SynthesisProgress(synthesis=previous, done=True)
+
+    @timed_stage("pipeline")
+    async def run_pipeline(
+        self,
+        request: SessionRequest,
+        session_id: Optional[str] = None,
+        on_progress: Optional[Callable[[str, int, int], None]] = None,
+        scheduler_session: Optional[str] = None
+    ) -> SessionResult:
+        """Run every stage of a brainstorming session server-side
+
+        ``on_progress(stage, completed, total)`` is called as each stage starts
+        and after every brainstorm unit. With a session store, every stage
+        output and brainstorm unit is checkpointed under ``session_id``, and
+        rerunning the same session resumes after the last completed one.
+        Agent calls are queued as ``scheduler_session`` (default ``session_id``).
+        """
+        session_id = session_id or uuid.uuid4().hex
+        # Queue this session's agent calls fairly against other sessions
+        current_session.set(scheduler_session or session_id)
+        report = on_progress or (lambda stage, completed, total: None)
+        stored: Dict[str, Any] = {}
+        if self.sessions is not None:
+            stored = self.sessions.stages(session_id)
+            # A new or changed request starts over; the same request resumes from its checkpoints
+            if "request" not in stored or SessionRequest.model_validate(stored["request"]) != request:
+                stored = {}
+                self.sessions.save_stage(session_id, "request", request)
+
+        async def stage(name: str, output_type: Any, run: Callable[[], Any]) -> Any:
+            if name in stored:
+                return output_adapter(output_type).validate_python(stored[name])
+            value = await run()
+            if self.sessions is not None:
+                self.sessions.save_stage(session_id, name, value)
+            return value
+
+        report("create_context", 0, 1)
+        context = await stage(
+            "context", BrainstormingContext, lambda: self.create_context(request.idea_input)
+        )
+        report("generate_questions", 0, request.model_count)
+        question_sets = await stage(
+            "question_sets", List[BrainstormQuestions],
+            lambda: self.generate_questions(context, request.model_count)
+        )
+        report("synthesize_questions", 0, 1)
+        synthesized_questions = await stage(
+            "synthesized_questions", BrainstormQuestions, lambda: self.synthesize_questions(question_sets)
+        )
+        question_chunks = await stage(
+            "question_chunks", List[Dict[str, Any]], lambda: self.chunk_questions(synthesized_questions)
+        )
+
+        total_units = request.participant_count * len(question_chunks)
+        report("brainstorm", 0, total_units)
+        grid: List[List[List[BrainstormResponse]]] = [
+            [[] for _ in question_chunks] for _ in range(request.participant_count)
+        ]
+        async def brainstorm() -> List[List[BrainstormResponse]]:
+            async for unit in self.stream_brainstorm_responses(
+                context, question_chunks, request.participant_count, session_id=session_id
+            ):
+                grid[unit.participant][unit.chunk_index] = unit.responses
+                report("brainstorm", unit.completed, unit.total)
+            all_responses = [
+                [response for chunk_responses in participant_chunks for response in chunk_responses]
+                for participant_chunks in grid
+            ]
+            if request.human_responses:
+                all_responses.append(request.human_responses)
+            return all_responses
+
+        all_responses = await stage("all_responses", List[List[BrainstormResponse]], brainstorm)
+        report("synthesize", 0, 1)
+        final_synthesis = await stage(
+            "final_synthesis", BrainstormSynthesis,
+            lambda: self.synthesize_responses(all_responses, question_chunks)
+        )
+        return SessionResult(
+            session_id=session_id,
+            context=context,
+            question_sets=question_sets,
+            synthesized_questions=synthesized_questions,
+            question_chunks=question_chunks,
+            all_responses=all_responses,
+            final_synthesis=final_synthesis
+        )
+
+    @timed_stage("batch")
+    async def stream_batch(self, request: BatchRequest) -> AsyncIterator[BatchItemResult]:
+        """Run the pipeline for every idea of a batch, yielding each result as it finishes
+
+        At most ``request.concurrency`` ideas run at once. Their agent calls all
+        run at BULK priority and are queued as one scheduler session, so a large
+        batch takes a single fair share below interactive users rather than one
+        per idea at the top priority. A failing idea yields a result with
+        ``error`` set rather than failing the batch. Items are checkpointed as
+        sessions ``{batch_id}-{index}``, so rerunning a batch with the same id
+        resumes its unfinished ideas. Closing the iterator early cancels the
+        ideas still running.
+        """
+        batch_id = request.batch_id or uuid.uuid4().hex
+        semaphore = asyncio.Semaphore(request.concurrency or self.batch_concurrency)
+
+        async def item(index: int, idea: IdeaInput) -> BatchItemResult:
+            session_id = f"{batch_id}-{index}"
+            # Each item runs in its own task, so this only affects the batch's calls
+            priority_override.set(BULK)
+            async with semaphore:
+                try:
+                    result = await self.run_pipeline(
+                        SessionRequest(
+                            idea_input=idea,
+                            model_count=request.model_count,
+                            participant_count=request.participant_count
+                        ),
+                        session_id=session_id,
+                        scheduler_session=f"batch-{batch_id}"
+                    )
+                except Exception as e:
+                    return BatchItemResult(index=index, session_id=session_id, error=str(e))
+            return BatchItemResult(index=index, session_id=session_id, result=result)
+
+        tasks = [asyncio.ensure_future(item(index, idea)) for index, idea in enumerate(request.ideas)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,153 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from shared.models import JobStatus
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """A unit of background work and its progress"""
+    def __init__(self, kind: str, run: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.completed = 0
+        self.total = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._run = run
+        self._task: Optional[asyncio.Task] = None
+        # The submitter's context (e.g. its session), since workers outlive the request that started them
+        self._context = contextvars.copy_context()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def report(self, stage: str, completed: int = 0, total: int = 0):
+        """Progress callback for the work function"""
+        self.stage = stage
+        self.completed = completed
+        self.total = total
+
+    def to_status(self) -> JobStatus:
+        return JobStatus(
+            job_id=self.id,
+            kind=self.kind,
+            status=self.status,
+            stage=self.stage,
+            completed=self.completed,
+            total=self.total,
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+class JobManager:
+    """Bounded in-process worker pool that runs jobs outside the HTTP request lifetime
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` wait;
+    the newest ``max_retained`` finished jobs are kept for result retrieval.
+    """
+    def __init__(self, max_workers: int = 4, max_queue: int = 100, max_retained: int = 1000):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_retained = max_retained
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_workers(self):
+        # Workers are started lazily so they bind to the loop serving requests
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    def submit(self, kind: str, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Queue a job; raises QueueFullError when the queue is at capacity"""
+        self._ensure_workers()
+        job = Job(kind, run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_queue} waiting)")
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left untouched"""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job._task is not None:
+            job._task.cancel()
+        else:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == "cancelled":
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+                job._task = job._context.run(asyncio.create_task, job._run(job))
+                try:
+                    # wait() rather than await, which would pass the worker's own cancellation on to the job
+                    await asyncio.wait({job._task})
+                except asyncio.CancelledError:
+                    # The worker itself is being cancelled (shutdown)
+                    job._task.cancel()
+                    raise
+                try:
+                    job.result = job._task.result()
+                    job.status = "succeeded"
+                except asyncio.CancelledError:
+                    job.status = "cancelled"
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                finally:
+                    job.finished_at = time.time()
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_retained)]:
+            del self._jobs[job_id]
+
+    async def shutdown(self):
+        """Cancel every worker and running job"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
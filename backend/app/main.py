@@ -1,85 +1,482 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import APIRouter, Body, Depends, FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from shared.models import (
     IdeaInput, BrainstormingContext, BrainstormQuestions,
-    BrainstormResponse, BrainstormSynthesis
+    BrainstormResponse, BrainstormSynthesis, SessionRequest, SessionResult,
+    SynthesisRequest, JobStatus, DocumentInfo, SessionCheckpoint, BatchRequest
 )
-from .idea_symphony import IdeaSymphony
-from typing import List, Dict, Any
-
-app = FastAPI(title="Idea Symphony API")
+from .config import idea_symphony_from_env
+from .documents import DocumentNotFoundError, DocumentTooLargeError
+from .jobs import JobManager, QueueFullError
+from .metrics import Metrics
+from .profiling import SamplingProfiler, TimedRoute, profile_path, request_timings, server_timing
+from .scheduler import current_session
+from .sessions import SessionStore
+from typing import List, Dict, Any, Literal, Optional, Union
 
 # Load environment variables
-from dotenv import load_dotenv
-import os
 load_dotenv()
 
-# Add Logfire logging
-import logfire
-logfire.configure(token=os.getenv('LOGFIRE_TOKEN'))
-logfire.instrument_pydantic_ai()
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with your frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Routes are collected here and mounted by create_app; TimedRoute feeds the Server-Timing header
+router = APIRouter(route_class=TimedRoute)
+
+class Services:
+    """Stores, pipeline and job queue behind one app's endpoints, configured from the environment
+
+    Built by ``create_app``, so every app gets its own and nothing is opened
+    or pruned until an app is created.
+    """
+    def __init__(self):
+        # Session checkpoints: "memory" for in-process only, otherwise a SQLite file
+        session_db = os.getenv('IDEA_SYMPHONY_SESSION_DB') or os.path.join(
+            tempfile.gettempdir(), 'idea-symphony-sessions.sqlite3'
+        )
+        # Sessions idle for longer than the TTL (seconds) or beyond the most recent IDEA_SYMPHONY_SESSION_MAX are pruned
+        self.sessions = SessionStore(
+            None if session_db == 'memory' else session_db,
+            ttl=float(os.getenv('IDEA_SYMPHONY_SESSION_TTL', str(7 * 24 * 3600))),
+            max_sessions=int(os.getenv('IDEA_SYMPHONY_SESSION_MAX', '10000'))
+        )
+        # Stage and agent call metrics, served in Prometheus text format at /metrics
+        self.metrics = Metrics()
+        # The scheduler, cache and document store IdeaSymphony builds are used by the endpoints too
+        self.idea_symphony = idea_symphony_from_env(sessions=self.sessions, metrics=self.metrics)
+        # Largest number of ideas accepted by /api/batch
+        self.batch_max_ideas = int(os.getenv('IDEA_SYMPHONY_BATCH_MAX_IDEAS', '1000'))
+        # Background jobs decouple long LLM work from HTTP request lifetimes
+        self.jobs = JobManager(
+            max_workers=int(os.getenv('IDEA_SYMPHONY_JOB_WORKERS', '4')),
+            max_queue=int(os.getenv('IDEA_SYMPHONY_JOB_QUEUE', '100'))
+        )
+
+def get_services(request: Request) -> Services:
+    return request.app.state.services
+
+# When Logfire instrumentation of agent calls is set up: "startup" (before serving),
+# "deferred" (in the background once serving, so traces of the first calls may be missed) or "off"
+instrumentation = os.getenv('IDEA_SYMPHONY_INSTRUMENTATION', 'startup')
+
+def configure_logfire():
+    import logfire
+    logfire.configure(token=os.getenv('LOGFIRE_TOKEN'))
+    logfire.instrument_pydantic_ai()
+
+def warm_up():
+    """Load what the first agent call needs, off the request path"""
+    if instrumentation == 'deferred':
+        configure_logfire()
+    import pydantic_ai  # noqa: F401
+
+async def bind_session(request: Request, call_next):
+    """Tag agent calls with the caller's session so the scheduler can queue sessions fairly"""
+    token = current_session.set(request.headers.get("X-Session-Id") or uuid.uuid4().hex)
+    try:
+        return await call_next(request)
+    finally:
+        current_session.reset(token)
+
+# Per-request sampling profiles: "off", "header" (requests sending X-Profile: 1) or "all"
+profile_mode = os.getenv('IDEA_SYMPHONY_PROFILE', 'off')
+profile_dir = os.getenv('IDEA_SYMPHONY_PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'idea-symphony-profiles')
+profile_interval = float(os.getenv('IDEA_SYMPHONY_PROFILE_INTERVAL', '0.005'))
 
-# Initialize IdeaSymphony
-idea_symphony = IdeaSymphony()
+async def time_request(request: Request, call_next):
+    """Report per-phase timings in a Server-Timing header and optionally profile the request
 
-@app.post("/api/create-context", response_model=BrainstormingContext)
-async def create_context(input_data: IdeaInput):
+    Streaming responses report the phases completed before their first byte;
+    their profile covers the whole stream.
+    """
+    timings: Dict[str, float] = {}
+    token = request_timings.set(timings)
+    profiler = None
+    if profile_mode == 'all' or (profile_mode == 'header' and request.headers.get("X-Profile") == "1"):
+        profiler = SamplingProfiler(interval=profile_interval).start()
+    start = time.perf_counter()
     try:
-        return await idea_symphony.create_context(input_data)
+        response = await call_next(request)
+    except BaseException:
+        if profiler is not None:
+            profiler.stop()
+        raise
+    finally:
+        request_timings.reset(token)
+    response.headers["Server-Timing"] = server_timing(timings, time.perf_counter() - start)
+    if profiler is not None:
+        path = profile_path(profile_dir, f"{request.method}-{request.url.path}")
+        response.headers["X-Profile-File"] = os.path.basename(path)
+        body = response.body_iterator
+        async def profiled_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                profiler.stop()
+                profiler.write(path)
+        response.body_iterator = profiled_body()
+    return response
+
+def http_error(e: Exception) -> HTTPException:
+    """Map an exception to an HTTP error, passing provider rate limiting through as 429"""
+    if getattr(e, "status_code", None) == 429:
+        return HTTPException(status_code=429, detail=str(e))
+    if isinstance(e, DocumentNotFoundError):
+        return HTTPException(status_code=404, detail=f"Document not found: {e.args[0]}")
+    return HTTPException(status_code=500, detail=str(e))
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Readiness probe: answers as soon as the app serves, without building agents or the OpenAPI schema"""
+    return {"status": "ok"}
+
+@router.post("/api/documents", response_model=DocumentInfo, status_code=201)
+async def upload_document(file: UploadFile = File(...), services: Services = Depends(get_services)):
+    """Store an uploaded document in chunks and return the id to reference it by"""
+    try:
+        document_id, size = await services.idea_symphony.documents.save(file)
+    except DocumentTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await file.close()
+    return DocumentInfo(document_id=document_id, filename=file.filename, size_bytes=size)
+
+@router.delete("/api/documents/{document_id}")
+async def delete_document(document_id: str, services: Services = Depends(get_services)):
+    if not services.idea_symphony.documents.delete(document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"deleted": document_id}
+
+def checkpoint_session(http_request: Request) -> Optional[str]:
+    """Session whose stage outputs are checkpointed: the caller's X-Session-Id, if sent"""
+    return http_request.headers.get("X-Session-Id")
+
+def checkpoint(http_request: Request, stage: str, value: Any) -> Any:
+    session_id = checkpoint_session(http_request)
+    if session_id:
+        get_services(http_request).sessions.save_stage(session_id, stage, value)
+    return value
+
+@router.post("/api/create-context", response_model=BrainstormingContext)
+async def create_context(input_data: IdeaInput, http_request: Request, services: Services = Depends(get_services)):
+    try:
+        checkpoint(http_request, "idea_input", input_data)
+        return checkpoint(http_request, "context", await services.idea_symphony.create_context(input_data))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/api/generate-questions", response_model=List[BrainstormQuestions])
+@router.post("/api/generate-questions", response_model=List[BrainstormQuestions])
 async def generate_questions(
     context: BrainstormingContext,
-    model_count: int = 1
+    http_request: Request,
+    model_count: int = 1,
+    services: Services = Depends(get_services)
 ):
     try:
-        return await idea_symphony.generate_questions(context, model_count)
+        return checkpoint(
+            http_request, "question_sets", await services.idea_symphony.generate_questions(context, model_count)
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/api/synthesize-questions", response_model=BrainstormQuestions)
-async def synthesize_questions(question_sets: List[BrainstormQuestions]):
+@router.post("/api/synthesize-questions", response_model=BrainstormQuestions)
+async def synthesize_questions(
+    question_sets: List[BrainstormQuestions],
+    http_request: Request,
+    mode: Optional[Literal["llm", "prefilter", "auto"]] = None,
+    services: Services = Depends(get_services)
+):
     try:
-        return await idea_symphony.synthesize_questions(question_sets)
+        return checkpoint(
+            http_request, "synthesized_questions",
+            await services.idea_symphony.synthesize_questions(question_sets, mode)
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/api/chunk-questions", response_model=List[Dict[str, Any]])
-async def chunk_questions(questions: BrainstormQuestions):
+@router.post("/api/chunk-questions", response_model=List[Dict[str, Any]])
+async def chunk_questions(
+    questions: BrainstormQuestions,
+    http_request: Request,
+    services: Services = Depends(get_services)
+):
     try:
-        return await idea_symphony.chunk_questions(questions)
+        return checkpoint(http_request, "question_chunks", await services.idea_symphony.chunk_questions(questions))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/api/brainstorm", response_model=List[List[BrainstormResponse]])
+@router.post("/api/brainstorm", response_model=List[List[BrainstormResponse]])
 async def brainstorm(
     context: BrainstormingContext,
     question_chunks: List[Dict[str, Any]],
-    participant_count: int = 2
+    http_request: Request,
+    participant_count: int = 2,
+    max_concurrency: Optional[int] = None,
+    services: Services = Depends(get_services)
 ):
     try:
-        return await idea_symphony.brainstorm_responses(
+        return checkpoint(http_request, "all_responses", await services.idea_symphony.brainstorm_responses(
             context, 
             question_chunks, 
-            participant_count
-        )
+            participant_count,
+            max_concurrency,
+            session_id=checkpoint_session(http_request)
+        ))
+    except Exception as e:
+        raise http_error(e)
+
+@router.post("/api/brainstorm/stream")
+async def brainstorm_stream(
+    context: BrainstormingContext,
+    question_chunks: List[Dict[str, Any]],
+    http_request: Request,
+    participant_count: int = 2,
+    max_concurrency: Optional[int] = None,
+    services: Services = Depends(get_services)
+):
+    """Stream BrainstormChunkResult objects as NDJSON, one line per completed unit
+
+    Units checkpointed earlier under the caller's X-Session-Id are replayed first.
+    """
+    session_id = checkpoint_session(http_request)
+    async def lines():
+        try:
+            async for result in services.idea_symphony.stream_brainstorm_responses(
+                context,
+                question_chunks,
+                participant_count,
+                max_concurrency,
+                session_id=session_id
+            ):
+                yield result.model_dump_json() + "\n"
+        except Exception as e:
+            # Headers are already sent, so report failures in-band
+            yield json.dumps({"error": str(e)}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def synthesis_request(body: Union[SynthesisRequest, List[List[BrainstormResponse]]]) -> SynthesisRequest:
+    """Accept either a bare list of responses or a SynthesisRequest with question chunks"""
+    if isinstance(body, SynthesisRequest):
+        return body
+    return SynthesisRequest(all_responses=body)
+
+@router.post("/api/synthesize", response_model=BrainstormSynthesis)
+async def synthesize(
+    body: Union[SynthesisRequest, List[List[BrainstormResponse]]],
+    http_request: Request,
+    services: Services = Depends(get_services)
+):
+    request = synthesis_request(body)
+    try:
+        return checkpoint(http_request, "final_synthesis", await services.idea_symphony.synthesize_responses(
+            request.all_responses,
+            request.question_chunks,
+            request.mode
+        ))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.post("/api/synthesize/stream")
+async def synthesize_stream(
+    body: Union[SynthesisRequest, List[List[BrainstormResponse]]],
+    http_request: Request,
+    services: Services = Depends(get_services)
+):
+    """Stream SynthesisProgress objects as NDJSON; the last line has done set"""
+    request = synthesis_request(body)
+    async def lines():
+        try:
+            async for progress in services.idea_symphony.stream_synthesize_responses(
+                request.all_responses,
+                request.question_chunks,
+                request.mode
+            ):
+                if progress.done:
+                    checkpoint(http_request, "final_synthesis", progress.synthesis)
+                yield progress.model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-@app.post("/api/synthesize", response_model=BrainstormSynthesis)
-async def synthesize(all_responses: List[List[BrainstormResponse]]):
+@router.post("/api/sessions", response_model=SessionResult)
+async def run_session(request: SessionRequest, services: Services = Depends(get_services)):
     try:
-        return await idea_symphony.synthesize_responses(all_responses)
+        return await services.idea_symphony.run_pipeline(request)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.post("/api/batch")
+async def run_batch(request: BatchRequest, services: Services = Depends(get_services)):
+    """Run the pipeline for many ideas concurrently, streaming a BatchItemResult per idea as NDJSON
+
+    Lines arrive in completion order; ``index`` refers back to the request.
+    """
+    if len(request.ideas) > services.batch_max_ideas:
+        raise HTTPException(status_code=413, detail=f"A batch can hold at most {services.batch_max_ideas} ideas")
+    async def lines():
+        try:
+            async for item in services.idea_symphony.stream_batch(request):
+                yield item.model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/api/sessions/{session_id}", response_model=SessionCheckpoint)
+async def get_session(session_id: str, services: Services = Depends(get_services)):
+    stages = services.sessions.stages(session_id)
+    units = services.sessions.units(session_id)
+    if not stages and not units:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return SessionCheckpoint(session_id=session_id, stages=stages, completed_units=len(units))
+
+@router.put("/api/sessions/{session_id}/stages/{stage}")
+async def save_session_stage(
+    session_id: str,
+    stage: str,
+    value: Any = Body(...),
+    services: Services = Depends(get_services)
+):
+    """Store a stage output edited on the client; later pipeline stages are dropped"""
+    services.sessions.save_stage(session_id, stage, value)
+    return {"session_id": session_id, "stage": stage}
+
+@router.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str, services: Services = Depends(get_services)):
+    if not services.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"deleted": session_id}
+
+def submit_job(services: Services, kind: str, run) -> JobStatus:
+    async def detached(job):
+        # The job keeps the caller's session but must not add to the finished request's Server-Timing
+        request_timings.set(None)
+        return await run(job)
+    try:
+        return services.jobs.submit(kind, detached).to_status()
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@router.post("/api/jobs/sessions", response_model=JobStatus, status_code=202)
+async def submit_session_job(request: SessionRequest, services: Services = Depends(get_services)):
+    return submit_job(
+        services, "session",
+        lambda job: services.idea_symphony.run_pipeline(request, session_id=job.id, on_progress=job.report)
+    )
+
+@router.post("/api/jobs/sessions/{session_id}/resume", response_model=JobStatus, status_code=202)
+async def resume_session_job(session_id: str, services: Services = Depends(get_services)):
+    """Rerun a checkpointed session, skipping every stage and brainstorm unit already stored"""
+    stored = services.sessions.stages(session_id).get("request")
+    if stored is None:
+        raise HTTPException(status_code=404, detail="No resumable session with this id")
+    request = SessionRequest.model_validate(stored)
+    return submit_job(
+        services, "session",
+        lambda job: services.idea_symphony.run_pipeline(request, session_id=session_id, on_progress=job.report)
+    )
+
+@router.post("/api/jobs/brainstorm", response_model=JobStatus, status_code=202)
+async def submit_brainstorm_job(
+    context: BrainstormingContext,
+    question_chunks: List[Dict[str, Any]],
+    http_request: Request,
+    participant_count: int = 2,
+    max_concurrency: Optional[int] = None,
+    services: Services = Depends(get_services)
+):
+    session_id = checkpoint_session(http_request)
+    async def run(job):
+        grid = [[[] for _ in question_chunks] for _ in range(participant_count)]
+        job.report("brainstorm", 0, participant_count * len(question_chunks))
+        async for unit in services.idea_symphony.stream_brainstorm_responses(
+            context, question_chunks, participant_count, max_concurrency, session_id=session_id
+        ):
+            grid[unit.participant][unit.chunk_index] = unit.responses
+            job.report("brainstorm", unit.completed, unit.total)
+        return [[resp for chunk in participant for resp in chunk] for participant in grid]
+    return submit_job(services, "brainstorm", run)
+
+@router.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, services: Services = Depends(get_services)):
+    job = services.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_status()
+
+@router.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str, services: Services = Depends(get_services)):
+    job = services.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
+@router.delete("/api/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str, services: Services = Depends(get_services)):
+    job = services.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_status()
+
+@router.get("/api/jobs")
+async def job_stats(services: Services = Depends(get_services)):
+    return services.jobs.stats()
+
+@router.get("/api/scheduler/stats")
+async def scheduler_stats(services: Services = Depends(get_services)):
+    return services.idea_symphony.scheduler.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics(services: Services = Depends(get_services)):
+    """Stage and agent call metrics in Prometheus text format"""
+    services.metrics.observe_scheduler(services.idea_symphony.scheduler.stats())
+    return PlainTextResponse(services.metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/cache/stats")
+async def cache_stats(services: Services = Depends(get_services)):
+    cache = services.idea_symphony.cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+def create_app() -> FastAPI:
+    """Build the API app with its own stores, pipeline and job queue (see ``Services``)
+
+    pydantic_ai, its providers and the agents are imported on the first agent
+    call (or by the background warm-up), so the app is ready to serve quickly.
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if instrumentation == 'startup':
+            configure_logfire()
+        app.state.warm_up = asyncio.create_task(asyncio.to_thread(warm_up))
+        yield
+        await app.state.services.jobs.shutdown()
+
+    app = FastAPI(title="Idea Symphony API", lifespan=lifespan)
+    app.state.services = Services()
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with your frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(bind_session)
+    app.middleware("http")(time_request)
+    app.include_router(router)
+    return app
+
+app = create_app()
@@ -0,0 +1,241 @@
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; stage and agent latencies range from milliseconds to minutes
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values: Dict[Labels, Any] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: Labels, value: float):
+        self.values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float):
+        # Per-bucket (non-cumulative) counts plus sum; rendering accumulates them
+        counts, total = self.values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.values[labels] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+def usage_counts(usage: Any) -> Tuple[int, int, int]:
+    """(input tokens, output tokens, model requests) of a run's usage, across pydantic_ai versions"""
+    if callable(usage):
+        usage = usage()
+    input_tokens = getattr(usage, "input_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "request_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if output_tokens is None:
+        output_tokens = getattr(usage, "response_tokens", None)
+    return input_tokens or 0, output_tokens or 0, getattr(usage, "requests", 1) or 1
+
+def outcome(error: Optional[BaseException]) -> str:
+    """Status label for a finished stage or call"""
+    if error is None:
+        return "ok"
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    # Raised by pydantic_ai once output validation has used up its retries
+    if type(error).__name__ == "UnexpectedModelBehavior":
+        return "validation_error"
+    return "error"
+
+class AgentCall:
+    """Handle for recording what one agent call used"""
+    def __init__(self, metrics: "Metrics", stage: str, model: str):
+        self.metrics = metrics
+        self.labels = (stage, model)
+
+    def record(self, result: Any):
+        input_tokens, output_tokens, requests = usage_counts(result.usage)
+        with self.metrics._lock:
+            self.metrics.agent_tokens.inc(self.labels + ("input",), input_tokens)
+            self.metrics.agent_tokens.inc(self.labels + ("output",), output_tokens)
+            # Every model request after the first retried a rejected output
+            if requests > 1:
+                self.metrics.agent_retries.inc(self.labels, requests - 1)
+
+class Metrics:
+    """In-process metrics for pipeline stages and agent calls, rendered in Prometheus text format
+
+    Stage metrics are labelled by stage; agent call metrics by agent stage and
+    model, so the slow stage per model and the concurrency actually reached
+    can be read off ``/metrics`` without an external tracing service.
+    """
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self.stage_duration = Histogram(
+            "idea_symphony_stage_duration_seconds", "Duration of pipeline stages", ("stage", "status"), buckets
+        )
+        self.stage_in_flight = Gauge("idea_symphony_stage_in_flight", "Pipeline stages currently running", ("stage",))
+        self.agent_duration = Histogram(
+            "idea_symphony_agent_call_duration_seconds",
+            "Duration of agent calls, excluding time queued in the scheduler",
+            ("stage", "model", "status"), buckets
+        )
+        self.agent_in_flight = Gauge(
+            "idea_symphony_agent_calls_in_flight", "Agent calls currently running", ("stage", "model")
+        )
+        self.agent_tokens = Counter(
+            "idea_symphony_agent_tokens_total", "Tokens used by agent calls", ("stage", "model", "kind")
+        )
+        self.agent_retries = Counter(
+            "idea_symphony_agent_retries_total", "Model requests retried after output validation failed",
+            ("stage", "model")
+        )
+        self.agent_validation_failures = Counter(
+            "idea_symphony_agent_validation_failures_total",
+            "Agent calls that failed because no valid output was produced", ("stage", "model")
+        )
+        self.agent_cache_hits = Counter(
+            "idea_symphony_agent_cache_hits_total", "Agent calls served from the response cache", ("stage",)
+        )
+        self.scheduler_in_flight = Gauge("idea_symphony_scheduler_in_flight", "Agent calls holding a scheduler slot")
+        self.scheduler_queue_depth = Gauge(
+            "idea_symphony_scheduler_queue_depth", "Agent calls waiting for a scheduler slot", ("model",)
+        )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage and count it as in flight while it runs"""
+        with self._lock:
+            self.stage_in_flight.inc((name,))
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                self.stage_in_flight.inc((name,), -1)
+                self.stage_duration.observe((name, outcome(error)), time.perf_counter() - start)
+
+    @contextmanager
+    def agent_call(self, stage: str, model: str) -> Iterator[AgentCall]:
+        """Time one agent call; record its usage on the yielded handle"""
+        labels = (stage, model)
+        with self._lock:
+            self.agent_in_flight.inc(labels)
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            yield AgentCall(self, stage, model)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            status = outcome(error)
+            with self._lock:
+                self.agent_in_flight.inc(labels, -1)
+                self.agent_duration.observe(labels + (status,), time.perf_counter() - start)
+                if status == "validation_error":
+                    self.agent_validation_failures.inc(labels)
+
+    def cache_hit(self, stage: str):
+        with self._lock:
+            self.agent_cache_hits.inc((stage,))
+
+    def observe_scheduler(self, stats: Dict[str, Any]):
+        """Copy the scheduler's current in-flight count and queue depths into gauges"""
+        with self._lock:
+            self.scheduler_in_flight.set((), stats["in_flight"])
+            for model, model_stats in stats["models"].items():
+                self.scheduler_queue_depth.set((model,), model_stats["queue_depth"])
+
+    def render(self) -> str:
+        metrics = [
+            self.stage_duration, self.stage_in_flight, self.agent_duration, self.agent_in_flight,
+            self.agent_tokens, self.agent_retries, self.agent_validation_failures, self.agent_cache_hits,
+            self.scheduler_in_flight, self.scheduler_queue_depth
+        ]
+        with self._lock:
+            return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+def timed_stage(name: str) -> Callable[[Callable], Callable]:
+    """Record an IdeaSymphony coroutine or async generator method as a stage in ``self.metrics``"""
+    def decorate(method: Callable) -> Callable:
+        if inspect.isasyncgenfunction(method):
+            @functools.wraps(method)
+            async def stream(self, *args, **kwargs):
+                items = method(self, *args, **kwargs)
+                try:
+                    with self.metrics.stage(name):
+                        async for item in items:
+                            yield item
+                finally:
+                    # Close the wrapped generator now, so its cleanup runs when the caller stops early
+                    await items.aclose()
+            return stream
+
+        @functools.wraps(method)
+        async def run(self, *args, **kwargs):
+            with self.metrics.stage(name):
+                return await method(self, *args, **kwargs)
+        return run
+    return decorate
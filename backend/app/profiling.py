@@ -0,0 +1,132 @@
+import functools
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, FrozenSet, Iterator, Optional
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+# Seconds spent per phase in the current request; set by the timing middleware and shared with child tasks
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+_active_phases: ContextVar[FrozenSet[str]] = ContextVar("active_phases", default=frozenset())
+
+# Server-Timing entries in header order, with their descriptions
+PHASES = {
+    "parse": "request parsing and validation",
+    "prompt": "prompt rendering",
+    "model": "agent calls",
+    "endpoint": "endpoint",
+    "serialize": "response model validation and JSON encoding",
+}
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's ``name`` phase
+
+    Nested blocks of the same phase are only counted once. Concurrent blocks
+    (e.g. parallel agent calls) are summed, so a phase can exceed the total.
+    """
+    timings = request_timings.get()
+    if timings is None or name in _active_phases.get():
+        yield
+        return
+    token = _active_phases.set(_active_phases.get() | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        _active_phases.reset(token)
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """Server-Timing header value, in milliseconds"""
+    entries = [
+        f'{name};dur={timings[name] * 1000:.2f};desc="{description}"'
+        for name, description in PHASES.items() if name in timings
+    ]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+class TimedRoute(APIRoute):
+    """Route that splits its handler time into parse, endpoint and serialize phases"""
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+            timings = request_timings.get()
+            if timings is not None:
+                timings["parse"] = time.perf_counter() - timings.pop("_handler_start", time.perf_counter())
+            with phase("endpoint"):
+                return await endpoint(*args, **kwargs)
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+        async def timed_handler(request: Request) -> Any:
+            timings = request_timings.get()
+            if timings is None:
+                return await handler(request)
+            start = time.perf_counter()
+            timings["_handler_start"] = start
+            try:
+                return await handler(request)
+            finally:
+                if timings.pop("_handler_start", None) is not None:
+                    # Rejected before the endpoint ran
+                    timings["parse"] = time.perf_counter() - start
+                else:
+                    # Whatever the handler spent outside parsing and the endpoint went into the response
+                    timings["serialize"] = max(
+                        0.0, time.perf_counter() - start - timings.get("parse", 0.0) - timings.get("endpoint", 0.0)
+                    )
+        return timed_handler
+
+class SamplingProfiler:
+    """Samples a thread's Python stack at a fixed interval into folded stacks
+
+    The output is the collapsed format read by flamegraph.pl and speedscope.
+    Profiling the event loop thread also samples whatever other requests it
+    is serving at the time.
+    """
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="idea-symphony-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        """Write the folded stacks, most frequent first"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+def profile_path(directory: str, name: str) -> str:
+    """Unique file in ``directory`` for a profile named after e.g. the request method and path"""
+    name = re.sub(r"[^\w.-]+", "_", name).strip("_")
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}.folded")
@@ -0,0 +1,207 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Session the current request belongs to; set by the API middleware and inherited by child tasks
+current_session: contextvars.ContextVar[str] = contextvars.ContextVar("current_session", default="default")
+# Priority for every agent call in the current context instead of its stage's, e.g. BULK for batch runs
+priority_override: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("priority_override", default=None)
+
+# Lower numbers are served first
+INTERACTIVE = 0
+BULK = 1
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most ``capacity`` units per minute"""
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if available now)"""
+        if self.capacity is None:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.level -= amount
+
+class _Waiter:
+    def __init__(self, tokens: float, future: asyncio.Future):
+        self.tokens = tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+
+class _ModelQueue:
+    """Per-model buckets plus waiters grouped by priority, then by session"""
+    def __init__(self, rpm: Optional[float], tpm: Optional[float]):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.levels: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def depth(self) -> int:
+        return sum(len(q) for sessions in self.levels.values() for q in sessions.values())
+
+class ProviderScheduler:
+    """Token-bucket rate limiter and fair scheduler for agent calls
+
+    Each model gets a requests-per-minute and tokens-per-minute bucket (``None``
+    means unlimited), and ``max_in_flight`` caps concurrent calls across all
+    models. Waiting calls are served by priority first, across every model
+    whose buckets allow a call, and round-robin across sessions within a
+    priority, so one large brainstorm cannot starve other users' interactive
+    stages even when those use a different model.
+    """
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        model_limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.model_limits = model_limits or {}
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            rpm, tpm = self.model_limits.get(model, (self.rpm, self.tpm))
+            queue = self._queues[model] = _ModelQueue(rpm, tpm)
+            self._stats[model] = {"calls": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0, "tokens": 0}
+        return queue
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = BULK, estimated_tokens: int = 0):
+        """Wait for capacity for one call; yields a dict where the caller records actual usage"""
+        queue = self._queue(model)
+        waiter = _Waiter(estimated_tokens, asyncio.get_running_loop().create_future())
+        sessions = queue.levels.setdefault(priority, OrderedDict())
+        sessions.setdefault(current_session.get(), deque()).append(waiter)
+        self._pump()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before cancellation; hand the slot back
+                self._release()
+            else:
+                self._discard(queue, waiter)
+            raise
+        wait = time.monotonic() - waiter.enqueued
+        stats = self._stats[model]
+        stats["calls"] += 1
+        stats["wait_total"] += wait
+        stats["wait_max"] = max(stats["wait_max"], wait)
+        if wait > 0.001:
+            stats["waited"] += 1
+        usage = {"tokens": None}
+        try:
+            yield usage
+        finally:
+            # Settle the token bucket against what the call actually used
+            if usage["tokens"] is not None:
+                queue.tokens.take(usage["tokens"] - estimated_tokens)
+                stats["tokens"] += usage["tokens"]
+            self._release()
+
+    def _release(self):
+        self.in_flight -= 1
+        self._pump()
+
+    def _discard(self, queue: _ModelQueue, waiter: _Waiter):
+        for sessions in queue.levels.values():
+            for session, waiters in list(sessions.items()):
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del sessions[session]
+                    return
+
+    def _next_waiter(self, queue: _ModelQueue) -> Optional[Tuple[int, "OrderedDict[str, Deque[_Waiter]]", str]]:
+        """(priority, sessions, session) of the waiter a model serves next, dropping cancelled ones"""
+        for priority in sorted(queue.levels):
+            sessions = queue.levels[priority]
+            while sessions:
+                session = next(iter(sessions))
+                waiter = sessions[session][0]
+                if not waiter.future.done():
+                    return priority, sessions, session
+                # Cancelled while queued; its task may not have run yet to discard it
+                self._discard(queue, waiter)
+        return None
+
+    def _pump(self):
+        """Grant free slots to the highest-priority waiters of every model the buckets allow, then schedule retries"""
+        while self.max_in_flight is None or self.in_flight < self.max_in_flight:
+            best = None
+            for model, queue in self._queues.items():
+                # A model with a timer is waiting for its buckets to refill
+                if queue.timer is not None:
+                    continue
+                head = self._next_waiter(queue)
+                if head is None:
+                    continue
+                priority, sessions, session = head
+                key = (priority, sessions[session][0].enqueued)
+                if best is None or key < best[0]:
+                    best = (key, model, queue, sessions, session)
+            if best is None:
+                return
+            _, model, queue, sessions, session = best
+            waiter = sessions[session][0]
+            queue.requests.refill()
+            queue.tokens.refill()
+            delay = max(queue.requests.wait_time(1), queue.tokens.wait_time(waiter.tokens))
+            if delay > 0:
+                queue.timer = asyncio.get_running_loop().call_later(delay, self._on_timer, model)
+                continue
+            self.in_flight += 1
+            queue.requests.take(1)
+            queue.tokens.take(min(waiter.tokens, queue.tokens.capacity or waiter.tokens))
+            # Round-robin: move this session to the back of its priority level
+            waiters = sessions.pop(session)
+            waiters.popleft()
+            if waiters:
+                sessions[session] = waiters
+            waiter.future.set_result(None)
+
+    def _on_timer(self, model: str):
+        self._queues[model].timer = None
+        self._pump()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait-time statistics per model"""
+        result: Dict[str, Any] = {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "models": {}}
+        for model, queue in self._queues.items():
+            stats = self._stats[model]
+            result["models"][model] = {
+                "queue_depth": queue.depth(),
+                "calls": stats["calls"],
+                "calls_waited": stats["waited"],
+                "wait_avg_seconds": stats["wait_total"] / stats["calls"] if stats["calls"] else 0.0,
+                "wait_max_seconds": stats["wait_max"],
+                "tokens": stats["tokens"],
+                "rpm_limit": queue.requests.capacity,
+                "tpm_limit": queue.tokens.capacity
+            }
+        return result
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic_core import to_json
+
+# Stage outputs in pipeline order; saving one invalidates every stage after it
+STAGES = (
+    "request", "idea_input", "context", "question_sets", "synthesized_questions",
+    "question_chunks", "all_responses", "final_synthesis"
+)
+
+def unit_fingerprint(context: Any, question_chunks: List[Dict[str, Any]]) -> str:
+    """Hash of a brainstorm's inputs, so stored units are only reused for the same context and questions"""
+    return hashlib.sha256(to_json([context, question_chunks])).hexdigest()
+
+class SessionStore:
+    """SQLite checkpoints of a session's stage outputs and brainstorm units
+
+    Stages listed in ``STAGES`` are ordered: saving one drops the stored
+    stages after it, since they were derived from the old value. Other stage
+    names (e.g. UI settings) are stored independently. Brainstorm units are
+    keyed by (participant, chunk) and the fingerprint of their inputs.
+
+    Sessions not written to for ``ttl`` seconds are dropped, as are the least
+    recently written ones beyond ``max_sessions``; None disables either limit.
+    """
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_sessions: Optional[int] = 10000
+    ):
+        self.path = path or ":memory:"
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "session_id TEXT, stage TEXT, value TEXT, updated_at REAL, "
+            "PRIMARY KEY (session_id, stage));"
+            "CREATE TABLE IF NOT EXISTS units ("
+            "session_id TEXT, fingerprint TEXT, participant INTEGER, chunk_index INTEGER, "
+            "value TEXT, updated_at REAL, "
+            "PRIMARY KEY (session_id, fingerprint, participant, chunk_index));"
+        )
+        self._db.commit()
+        with self._lock:
+            self._evict()
+
+    def _written(self):
+        """Commit a write and prune every 50 writes; called with the lock held"""
+        self._db.commit()
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= 50:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired sessions, then the least recently written ones over ``max_sessions``"""
+        self._writes_since_evict = 0
+        # Last write per session, across stages and units
+        activity = (
+            "SELECT session_id, MAX(updated_at) AS updated_at FROM ("
+            "SELECT session_id, updated_at FROM stages UNION ALL SELECT session_id, updated_at FROM units"
+            ") GROUP BY session_id"
+        )
+        stale = set()
+        if self.ttl is not None:
+            stale.update(row[0] for row in self._db.execute(
+                f"SELECT session_id FROM ({activity}) WHERE updated_at < ?", (time.time() - self.ttl,)
+            ))
+        if self.max_sessions is not None:
+            stale.update(row[0] for row in self._db.execute(
+                f"SELECT session_id FROM ({activity}) ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                (self.max_sessions,)
+            ))
+        for table in ("stages", "units"):
+            self._db.executemany(f"DELETE FROM {table} WHERE session_id = ?", [(sid,) for sid in stale])
+        self._db.commit()
+
+    def save_stage(self, session_id: str, stage: str, value: Any):
+        with self._lock:
+            if stage in STAGES:
+                later = STAGES[STAGES.index(stage) + 1:]
+                self._db.execute(
+                    f"DELETE FROM stages WHERE session_id = ? AND stage IN ({','.join('?' * len(later))})",
+                    (session_id, *later)
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?)",
+                (session_id, stage, to_json(value).decode("utf-8"), time.time())
+            )
+            self._written()
+
+    def stages(self, session_id: str) -> Dict[str, Any]:
+        """Every stored stage output for a session, as plain JSON values"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, value FROM stages WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {stage: json.loads(value) for stage, value in rows}
+
+    def save_unit(self, session_id: str, fingerprint: str, participant: int, chunk_index: int, responses: Any):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, fingerprint, participant, chunk_index, to_json(responses).decode("utf-8"), time.time())
+            )
+            self._written()
+
+    def units(self, session_id: str, fingerprint: Optional[str] = None) -> Dict[Tuple[int, int], Any]:
+        """Stored brainstorm units by (participant, chunk_index), optionally only those matching ``fingerprint``"""
+        query = "SELECT participant, chunk_index, value FROM units WHERE session_id = ?"
+        params: Tuple[Any, ...] = (session_id,)
+        if fingerprint is not None:
+            query += " AND fingerprint = ?"
+            params += (fingerprint,)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return {(participant, chunk_index): json.loads(value) for participant, chunk_index, value in rows}
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM stages WHERE session_id = ?", (session_id,)).rowcount
+            deleted += self._db.execute("DELETE FROM units WHERE session_id = ?", (session_id,)).rowcount
+            self._db.commit()
+        return deleted > 0
@@ -0,0 +1,55 @@
+"""Micro-benchmark: per-call overhead of building a pydantic_ai Agent each time
+versus reusing it from the AgentRegistry.
+
+Run from the repository root:
+
+    python backend/benchmarks/agent_overhead.py --iterations 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+from app.agents import AgentRegistry
+from app.idea_symphony import IdeaSymphony
+
+async def bench_fresh(config, prompt: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        agent = Agent(**config)
+        await agent.run(prompt)
+    return (time.perf_counter() - start) / iterations
+
+async def bench_registry(registry: AgentRegistry, stage: str, prompt: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        agent = registry.get(stage)
+        await agent.run(prompt)
+    return (time.perf_counter() - start) / iterations
+
+async def main(iterations: int):
+    symphony = IdeaSymphony()
+    # TestModel answers instantly, so the timings isolate agent construction and run overhead
+    configs = {
+        stage: {**config, "model": TestModel()}
+        for stage, config in symphony.agents.configs.items()
+    }
+    registry = AgentRegistry(configs)
+    print(f"{'stage':<22}{'fresh (ms)':>12}{'pooled (ms)':>13}{'saved':>9}")
+    for stage, config in configs.items():
+        fresh = await bench_fresh(config, "benchmark prompt", iterations)
+        pooled = await bench_registry(registry, stage, "benchmark prompt", iterations)
+        saved = (1 - pooled / fresh) * 100 if fresh else 0.0
+        print(f"{stage:<22}{fresh * 1000:>12.3f}{pooled * 1000:>13.3f}{saved:>8.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,160 @@
+"""Load generator: drive N concurrent brainstorming sessions against the API and
+report throughput plus p50/p95/p99 latency per endpoint.
+
+Against a running backend (start it with IDEA_SYMPHONY_FAKE_MODEL=1 to avoid
+provider calls):
+
+    python backend/benchmarks/load_test.py --base-url http://localhost:8000 --sessions 50 --concurrency 10
+
+Fully offline, serving the app in-process with the fake model:
+
+    python backend/benchmarks/load_test.py --in-process --latency-mean 0.5 --sessions 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+
+import httpx
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Recorder:
+    """Collects latencies and errors per endpoint"""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, endpoint: str, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await client.post(endpoint, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            self.errors[endpoint] += 1
+            raise
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+
+    def report(self, elapsed: float, sessions_ok: int, sessions_failed: int) -> Dict[str, Any]:
+        return {
+            "elapsed_seconds": elapsed,
+            "sessions_completed": sessions_ok,
+            "sessions_failed": sessions_failed,
+            "sessions_per_second": sessions_ok / elapsed if elapsed else 0.0,
+            "endpoints": {
+                endpoint: {
+                    "requests": len(samples),
+                    "errors": self.errors[endpoint],
+                    "requests_per_second": len(samples) / elapsed if elapsed else 0.0,
+                    "p50": percentile(samples, 50),
+                    "p95": percentile(samples, 95),
+                    "p99": percentile(samples, 99)
+                }
+                for endpoint, samples in self.latencies.items()
+            }
+        }
+
+async def run_steps(client: httpx.AsyncClient, recorder: Recorder, idea: str, args) -> None:
+    """One session through the same six calls the Streamlit client makes"""
+    context = await recorder.call(client, "/api/create-context", json={"idea_text": idea})
+    question_sets = await recorder.call(
+        client, "/api/generate-questions", json=context, params={"model_count": args.models}
+    )
+    questions = await recorder.call(client, "/api/synthesize-questions", json=question_sets)
+    chunks = await recorder.call(client, "/api/chunk-questions", json=questions)
+    responses = await recorder.call(
+        client, "/api/brainstorm",
+        json={"context": context, "question_chunks": chunks},
+        params={"participant_count": args.participants}
+    )
+    await recorder.call(client, "/api/synthesize", json=responses)
+
+async def run_session(client: httpx.AsyncClient, recorder: Recorder, idea: str, args) -> None:
+    """One session through the single server-side pipeline endpoint"""
+    await recorder.call(client, "/api/sessions", json={
+        "idea_input": {"idea_text": idea},
+        "model_count": args.models,
+        "participant_count": args.participants
+    })
+
+def build_client(args) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(args.timeout)
+    if not args.in_process:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=timeout)
+    os.environ["IDEA_SYMPHONY_FAKE_MODEL"] = "1"
+    os.environ["IDEA_SYMPHONY_FAKE_LATENCY"] = args.latency
+    os.environ["IDEA_SYMPHONY_FAKE_LATENCY_MEAN"] = str(args.latency_mean)
+    os.environ["IDEA_SYMPHONY_FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+    os.environ.setdefault("LOGFIRE_CONSOLE", "false")
+    os.environ.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+    from app.main import create_app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://loadtest", timeout=timeout)
+
+async def main(args) -> Dict[str, Any]:
+    recorder = Recorder()
+    flow = run_session if args.mode == "session" else run_steps
+    semaphore = asyncio.Semaphore(args.concurrency)
+    outcomes = {"ok": 0, "failed": 0}
+
+    async with build_client(args) as client:
+        async def one(index: int):
+            async with semaphore:
+                try:
+                    await flow(client, recorder, f"Load test idea #{index}: a community garden app", args)
+                    outcomes["ok"] += 1
+                except Exception:
+                    outcomes["failed"] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+    return recorder.report(elapsed, outcomes["ok"], outcomes["failed"])
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"{report['sessions_completed']} sessions ok, {report['sessions_failed']} failed in "
+        f"{report['elapsed_seconds']:.2f}s ({report['sessions_per_second']:.2f} sessions/s)"
+    )
+    print(f"{'endpoint':<28}{'reqs':>6}{'errs':>6}{'req/s':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<28}{stats['requests']:>6}{stats['errors']:>6}{stats['requests_per_second']:>8.2f}"
+            f"{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="serve the app in-process with the fake model")
+    parser.add_argument("--mode", choices=["steps", "session"], default="steps",
+                        help="six client-driven calls per session, or one /api/sessions call")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--participants", type=int, default=2)
+    parser.add_argument("--models", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--latency", default="lognormal", help="fake model latency distribution (in-process only)")
+    parser.add_argument("--latency-mean", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,247 @@
+"""Per-stage benchmark suite for the IdeaSymphony pipeline and its API endpoints.
+
+Every stage and endpoint runs against a deterministic zero-latency stand-in
+model seeded from frontend/app/mock_data.json, so the numbers isolate our own
+overhead: prompt rendering, validation, scheduling and serialization. Each
+sweep dimension (participant_count, model_count, question groups, document
+size) is varied one at a time from a base configuration. The report also
+records how much answer clustering shrinks the synthesis prompt for the mock
+session's two participants, whose answers are distinct as in a real session.
+
+    python backend/benchmarks/pipeline_bench.py --output bench.json
+    python backend/benchmarks/pipeline_bench.py --output new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+os.environ.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+os.environ.setdefault("LOGFIRE_CONSOLE", "false")
+os.environ.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+
+import httpx
+from pydantic_core import to_json
+from shared.models import (
+    IdeaInput, BrainstormingContext, BrainstormQuestions, BrainstormResponse
+)
+from app.fake_model import build_fake_model
+from app.idea_symphony import IdeaSymphony
+
+MOCK_DATA_PATH = os.path.join(ROOT, "frontend", "app", "mock_data.json")
+BASE = {"participant_count": 2, "model_count": 2, "question_groups": 6, "document_chars": 0}
+SWEEPS = {
+    "participant_count": [1, 2, 5],
+    "model_count": [1, 2, 3],
+    "question_groups": [2, 6, 12],
+    "document_chars": [0, 10_000, 100_000],
+}
+QUICK_SWEEPS = {name: values[:2] for name, values in SWEEPS.items()}
+
+class Fixtures:
+    """Deterministic model outputs derived from the mock session, scaled to the current sweep point"""
+    def __init__(self, mock: Dict[str, Any]):
+        self.mock = mock
+        self.question_groups = BASE["question_groups"]
+        self.groups = mock["synthesize_questions"]["question_groups"]
+
+    def questions(self, rng=None) -> Dict[str, Any]:
+        groups = []
+        for i in range(self.question_groups):
+            group = self.groups[i % len(self.groups)]
+            groups.append({"heading": f"{group['heading']} ({i + 1})", "questions": group["questions"]})
+        return {"question_groups": groups}
+
+    def model_fixtures(self) -> Dict[str, Any]:
+        return {
+            "BrainstormingContext": self.mock["create_context"],
+            "BrainstormQuestions": self.questions,
+            "List[BrainstormResponse]": self.mock["brainstorm"][0],
+            "BrainstormSynthesis": self.mock["synthesize"],
+        }
+
+    def inputs(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Stage inputs for a sweep point, mirroring what the previous stage would have produced"""
+        self.question_groups = params["question_groups"]
+        questions = BrainstormQuestions(**self.questions())
+        document = (self.mock["create_context"]["context"] + "\n\n") * (params["document_chars"] // 600 + 1)
+        return {
+            "idea_input": IdeaInput(
+                idea_text=self.mock["idea_text"],
+                document_content=document[:params["document_chars"]] or None
+            ),
+            "context": BrainstormingContext(**self.mock["create_context"]),
+            "question_sets": [questions] * params["model_count"],
+            "questions": questions,
+            # The mock participants' answers, once per question group; participants beyond them repeat them
+            "all_responses": [
+                [
+                    BrainstormResponse(question=f"{r['question']} ({g + 1})", answers=r["answers"])
+                    for g in range(params["question_groups"])
+                    for r in self.mock["brainstorm"][p % len(self.mock["brainstorm"])]
+                ]
+                for p in range(params["participant_count"])
+            ],
+        }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, Any]:
+    """Median wall and CPU time over ``repeat`` runs, then one traced run for peak memory"""
+    walls, cpus = [], []
+    result = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = await fn()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    tracemalloc.start()
+    await fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Serialization overhead: encoding the result as it would go over the wire
+    start = time.perf_counter()
+    payload = to_json(result)
+    serialize = time.perf_counter() - start
+    return {
+        "wall_seconds": statistics.median(walls),
+        "cpu_seconds": statistics.median(cpus),
+        "peak_memory_kib": peak / 1024,
+        "serialize_seconds": serialize,
+        "payload_bytes": len(payload),
+    }
+
+def stage_calls(symphony: IdeaSymphony, inputs: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Callable]:
+    return {
+        "create_context": lambda: symphony.create_context(inputs["idea_input"]),
+        "generate_questions": lambda: symphony.generate_questions(inputs["context"], params["model_count"]),
+        "synthesize_questions": lambda: symphony.synthesize_questions(inputs["question_sets"]),
+        "chunk_questions": lambda: symphony.chunk_questions(inputs["questions"]),
+        "brainstorm_responses": lambda: symphony.brainstorm_responses(
+            inputs["context"], inputs["chunks"], params["participant_count"]
+        ),
+        "synthesize_responses": lambda: symphony.synthesize_responses(inputs["all_responses"]),
+    }
+
+def endpoint_calls(client: httpx.AsyncClient, inputs: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Callable]:
+    async def post(path: str, body: Any, query: Optional[Dict[str, Any]] = None) -> Any:
+        response = await client.post(path, content=to_json(body), params=query,
+                                     headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        return response.json()
+
+    return {
+        "/api/create-context": lambda: post("/api/create-context", inputs["idea_input"]),
+        "/api/generate-questions": lambda: post(
+            "/api/generate-questions", inputs["context"], {"model_count": params["model_count"]}
+        ),
+        "/api/synthesize-questions": lambda: post("/api/synthesize-questions", inputs["question_sets"]),
+        "/api/chunk-questions": lambda: post("/api/chunk-questions", inputs["questions"]),
+        "/api/brainstorm": lambda: post(
+            "/api/brainstorm",
+            {"context": inputs["context"], "question_chunks": inputs["chunks"]},
+            {"participant_count": params["participant_count"]}
+        ),
+        "/api/synthesize": lambda: post("/api/synthesize", inputs["all_responses"]),
+    }
+
+def prompt_sizes(symphony: IdeaSymphony, all_responses: List[List[BrainstormResponse]]) -> Dict[str, Any]:
+    """Synthesis prompt size with every answer verbatim versus with near-duplicate answers clustered"""
+    verbatim = len(symphony._format_by_participant(all_responses))
+    clustered = len(symphony._format_clusters(all_responses))
+    print(f"{'prompt:synthesis (mock participants)':<38}{verbatim:>10} -> {clustered} chars")
+    return {
+        "participants": len(all_responses),
+        "verbatim_chars": verbatim,
+        "clustered_chars": clustered,
+        "reduction": 1 - clustered / verbatim if verbatim else 0.0,
+    }
+
+def sweep_points(sweeps: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    points = [dict(BASE)]
+    for name, values in sweeps.items():
+        for value in values:
+            point = {**BASE, name: value}
+            if point not in points:
+                points.append(point)
+    return points
+
+async def run(args) -> Dict[str, Any]:
+    with open(MOCK_DATA_PATH) as f:
+        fixtures = Fixtures(json.load(f))
+    model = build_fake_model(latency="fixed", latency_mean=0.0, seed=0, fixtures=fixtures.model_fixtures())
+
+    symphony = IdeaSymphony()
+    symphony.use_model(model)
+    from app.main import create_app
+    app = create_app()
+    app.state.services.idea_symphony.use_model(model)
+
+    results = []
+    prompts = prompt_sizes(symphony, [
+        [BrainstormResponse(**r) for r in participant] for participant in fixtures.mock["brainstorm"]
+    ])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for params in sweep_points(QUICK_SWEEPS if args.quick else SWEEPS):
+            inputs = fixtures.inputs(params)
+            inputs["chunks"] = await symphony.chunk_questions(inputs["questions"])
+            targets = {f"stage:{name}": call for name, call in stage_calls(symphony, inputs, params).items()}
+            if not args.stages_only:
+                targets.update({f"endpoint:{path}": call for path, call in endpoint_calls(client, inputs, params).items()})
+            for target, call in targets.items():
+                metrics = await measure(call, args.repeat)
+                results.append({"target": target, "params": params, **metrics})
+                print(f"{target:<38}{json.dumps(params):<95}{metrics['wall_seconds'] * 1000:>10.2f} ms")
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.time(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "synthesis_prompt": prompts,
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print the wall-time ratio of each target/params pair against a baseline report"""
+    def key(entry):
+        return entry["target"], json.dumps(entry["params"], sort_keys=True)
+    previous = {key(entry): entry for entry in baseline["results"]}
+    print(f"\nvs {baseline['meta'].get('revision')}: wall-time ratio (new / old)")
+    for entry in report["results"]:
+        old = previous.get(key(entry))
+        if old and old["wall_seconds"]:
+            ratio = entry["wall_seconds"] / old["wall_seconds"]
+            flag = "  <-- slower" if ratio > 1.2 else ""
+            print(f"{entry['target']:<38}{key(entry)[1]:<95}{ratio:>8.2f}x{flag}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="sweep only the two smallest values per dimension")
+    parser.add_argument("--stages-only", action="store_true", help="skip the FastAPI endpoint benchmarks")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
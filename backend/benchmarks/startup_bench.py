@@ -0,0 +1,129 @@
+"""Startup benchmark: import time of the backend app and time until /healthz answers.
+
+Each run imports app.main in a fresh interpreter with ``-X importtime`` and
+reports the wall time, the slowest top-level imports and whether modules that
+should load lazily (pydantic_ai, logfire) were imported at startup. With
+``--serve`` it also starts uvicorn and polls /healthz until it answers.
+
+Run from the repository root:
+
+    python backend/benchmarks/startup_bench.py --repeat 5 --serve --output startup.json
+
+Exits with status 1 when ``--max-import-seconds`` is exceeded or a lazy
+module is imported, so it can guard against startup regressions in CI.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BACKEND = os.path.join(ROOT, "backend")
+
+LAZY_MODULES = ("pydantic_ai", "logfire")
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, BACKEND, env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    # Keep the benchmark offline; storage uses the defaults, so importing app.main opens the real session store
+    env.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+    env.setdefault("LOGFIRE_CONSOLE", "false")
+    # As in the backend container: otherwise logfire's pydantic plugin imports logfire at startup
+    env.setdefault("PYDANTIC_DISABLE_PLUGINS", "__all__")
+    return env
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, depth, cumulative microseconds) for every line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+def import_once() -> Dict[str, Any]:
+    code = (
+        "import sys, time; start = time.perf_counter(); import app.main; "
+        "print(time.perf_counter() - start); "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND, env=child_env(), capture_output=True, text=True, check=True
+    )
+    seconds, loaded = (result.stdout.strip().splitlines() + [""])[:2]
+    return {"seconds": float(seconds), "lazy_loaded": [m for m in loaded.split(",") if m],
+            "imports": parse_importtime(result.stderr)}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve_once(timeout: float) -> float:
+    """Seconds from launching uvicorn until /healthz returns 200"""
+    import httpx
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=BACKEND, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"/healthz did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main(args) -> Dict[str, Any]:
+    runs = [import_once() for _ in range(args.repeat)]
+    seconds = [run["seconds"] for run in runs]
+    # Slowest top-level imports of the last run, by cumulative time
+    top = sorted((e for e in runs[-1]["imports"] if e[1] == 1), key=lambda e: e[2], reverse=True)[:args.top]
+    report: Dict[str, Any] = {
+        "import_seconds": {"median": statistics.median(seconds), "min": min(seconds), "max": max(seconds)},
+        "lazy_loaded": sorted({m for run in runs for m in run["lazy_loaded"]}),
+        "top_imports": [{"module": name, "ms": micros / 1000} for name, _, micros in top],
+    }
+    print(f"{'import app.main':<38}{report['import_seconds']['median'] * 1000:>10.1f} ms (median of {args.repeat})")
+    for entry in report["top_imports"]:
+        print(f"  {entry['module']:<36}{entry['ms']:>10.1f} ms")
+    print(f"{'lazy modules loaded at import':<38}{', '.join(report['lazy_loaded']) or 'none':>10}")
+    if args.serve:
+        ready = [serve_once(args.timeout) for _ in range(args.repeat)]
+        report["healthz_seconds"] = {"median": statistics.median(ready), "min": min(ready), "max": max(ready)}
+        print(f"{'launch to /healthz':<38}{report['healthz_seconds']['median'] * 1000:>10.1f} ms (median of {args.repeat})")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest top-level imports to list")
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn launch until /healthz answers")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-import-seconds", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--allow-lazy", action="store_true", help="do not fail when pydantic_ai or logfire load at import")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    report = main(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    failed = args.max_import_seconds is not None and report["import_seconds"]["median"] > args.max_import_seconds
+    if report["lazy_loaded"] and not args.allow_lazy:
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,25 @@
+import asyncio
+from app.fake_model import build_fake_model
+from app.idea_symphony import IdeaSymphony
+from app.scheduler import BULK, current_session
+from shared.models import BatchRequest, IdeaInput
+
+def test_batch_calls_run_at_bulk_priority_as_one_session():
+    symphony = IdeaSymphony()
+    symphony.use_model(build_fake_model(latency="fixed", latency_mean=0.0, seed=0))
+    seen = set()
+    slot = symphony.scheduler.slot
+
+    def recording_slot(model, priority, estimated_tokens=0):
+        seen.add((priority, current_session.get()))
+        return slot(model, priority, estimated_tokens)
+
+    symphony.scheduler.slot = recording_slot
+
+    async def run():
+        request = BatchRequest(ideas=[IdeaInput(idea_text="a"), IdeaInput(idea_text="b")], batch_id="nightly")
+        return [item async for item in symphony.stream_batch(request)]
+
+    items = asyncio.run(run())
+    assert [item.error for item in items] == [None, None]
+    assert seen == {(BULK, "batch-nightly")}
@@ -0,0 +1,34 @@
+from app.dedup import cluster_answers, merge_question_sets
+from shared.models import BrainstormQuestion, BrainstormQuestionGroup, BrainstormQuestions, BrainstormResponse
+
+def question_set(*questions):
+    return BrainstormQuestions(question_groups=[BrainstormQuestionGroup(
+        heading="Budget",
+        questions=[BrainstormQuestion(short_summary=s, full_description=d) for s, d in questions]
+    )])
+
+def test_similar_but_different_questions_are_kept_whole():
+    marketing = ("Marketing budget", "How much should we spend on marketing in the first year of operation?")
+    hiring = ("Hiring budget", "How much should we spend on hiring staff in the first year of operation?")
+    merged = merge_question_sets([question_set(marketing), question_set(hiring)])
+    questions = [(q.short_summary, q.full_description) for q in merged.question_groups[0].questions]
+    assert questions == [marketing, hiring]
+
+def test_near_verbatim_questions_keep_the_more_detailed_one():
+    short = ("Marketing budget", "How much should we spend on marketing in the first year?")
+    detailed = ("Marketing budget.", "How much should we spend on marketing in the first year of it?")
+    merged = merge_question_sets([question_set(short), question_set(detailed)])
+    questions = [(q.short_summary, q.full_description) for q in merged.question_groups[0].questions]
+    assert questions == [detailed]
+
+def test_near_verbatim_answers_collapse_to_the_longest_with_every_participant():
+    answers = [
+        ["Partner with local farms for fresh seasonal produce", "Run a weekly tasting night"],
+        ["Partner with local farms for fresh, seasonal produce.", "Offer a loyalty card"],
+    ]
+    responses = [[BrainstormResponse(question="Ideas?", answers=a)] for a in answers]
+    assert cluster_answers(responses) == [("Ideas?", [
+        ("Partner with local farms for fresh, seasonal produce.", [0, 1]),
+        ("Run a weekly tasting night", [0]),
+        ("Offer a loyalty card", [1]),
+    ])]
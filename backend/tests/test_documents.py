@@ -0,0 +1,29 @@
+import asyncio
+import io
+import os
+import time
+from app.documents import DocumentStore
+
+class Upload:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int) -> bytes:
+        return self.file.read(size)
+
+def test_same_content_is_stored_once(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    first, _ = asyncio.run(store.save(Upload(b"notes")))
+    second, _ = asyncio.run(store.save(Upload(b"notes")))
+    assert first == second
+    assert os.listdir(tmp_path) == [f"{first}.txt"]
+
+def test_unused_and_excess_documents_are_pruned(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    ids = [asyncio.run(store.save(Upload(data)))[0] for data in (b"idle", b"older", b"newer")]
+    old = time.time() - 3600
+    os.utime(store.path(ids[0]), (old, old))
+    os.utime(store.path(ids[1]), (old + 1800, old + 1800))
+
+    DocumentStore(str(tmp_path), ttl=2700, max_total_bytes=5)
+    assert sorted(os.listdir(tmp_path)) == [f"{ids[2]}.txt"]
@@ -0,0 +1,40 @@
+import asyncio
+from app.jobs import JobManager
+
+def test_shutdown_stops_workers_with_a_running_job():
+    async def scenario():
+        manager = JobManager(max_workers=1)
+        started = asyncio.Event()
+
+        async def run(job):
+            started.set()
+            await asyncio.Event().wait()
+
+        job = manager.submit("test", run)
+        await started.wait()
+        await manager.shutdown()
+        assert job._task.cancelled()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+def test_cancelled_job_does_not_stop_its_worker():
+    async def scenario():
+        manager = JobManager(max_workers=1)
+        started = asyncio.Event()
+
+        async def hang(job):
+            started.set()
+            await asyncio.Event().wait()
+
+        async def finish(job):
+            return "done"
+
+        hung = manager.submit("test", hang)
+        await started.wait()
+        manager.cancel(hung.id)
+        done = manager.submit("test", finish)
+        await manager._queue.join()
+        assert (hung.status, done.status, done.result) == ("cancelled", "succeeded", "done")
+        await manager.shutdown()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
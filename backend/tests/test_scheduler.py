@@ -0,0 +1,54 @@
+import asyncio
+from app.scheduler import BULK, INTERACTIVE, ProviderScheduler
+
+def test_cancelled_waiter_is_not_granted_a_slot():
+    async def scenario():
+        scheduler = ProviderScheduler(max_in_flight=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot("model"):
+                await release.wait()
+
+        async def waiter():
+            async with scheduler.slot("model"):
+                pass
+
+        ta = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        tb = asyncio.ensure_future(waiter())
+        await asyncio.sleep(0)
+        # The holder releases before the cancelled waiter's task gets to discard itself
+        release.set()
+        tb.cancel()
+        await asyncio.gather(ta, tb, return_exceptions=True)
+        assert scheduler.in_flight == 0
+
+        async with scheduler.slot("model"):
+            assert scheduler.in_flight == 1
+        assert scheduler.in_flight == 0
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+def test_priority_applies_across_models():
+    async def scenario():
+        scheduler = ProviderScheduler(max_in_flight=1)
+        release = asyncio.Event()
+        order = []
+
+        async def call(model, priority, name):
+            async with scheduler.slot(model, priority):
+                order.append(name)
+                if name == "hold":
+                    await release.wait()
+
+        tasks = [asyncio.ensure_future(call("a", BULK, "hold"))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(call("a", BULK, f"bulk{i}")) for i in range(3)]
+        tasks.append(asyncio.ensure_future(call("b", INTERACTIVE, "interactive")))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["hold", "interactive", "bulk0", "bulk1", "bulk2"]
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
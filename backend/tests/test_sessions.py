@@ -0,0 +1,19 @@
+import time
+from app.sessions import SessionStore
+
+def test_idle_and_excess_sessions_are_pruned(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SessionStore(path)
+    store.save_stage("idle", "request", {"idea": "old"})
+    store.save_unit("idle", "fp", 0, 0, [])
+    for session_id in ("a", "b", "c"):
+        store.save_stage(session_id, "request", {"idea": session_id})
+    # Back-date every write of the idle session past the TTL
+    store._db.execute("UPDATE stages SET updated_at = ? WHERE session_id = 'idle'", (time.time() - 3600,))
+    store._db.execute("UPDATE units SET updated_at = ? WHERE session_id = 'idle'", (time.time() - 3600,))
+    store._db.commit()
+
+    reopened = SessionStore(path, ttl=60, max_sessions=2)
+    assert reopened.stages("idle") == {} and reopened.units("idle") == {}
+    assert reopened.stages("a") == {}
+    assert reopened.stages("b") and reopened.stages("c")
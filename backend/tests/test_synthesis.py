@@ -0,0 +1,25 @@
+import asyncio
+from app.idea_symphony import IdeaSymphony
+from shared.models import BrainstormResponse
+
+CHUNKS = [
+    {"heading": "Budget", "questions": [{"short_summary": "Marketing budget", "full_description": "How much?"}]},
+    {"heading": "Team", "questions": [{"short_summary": "First hires", "full_description": "Who first?"}]},
+]
+
+def test_responses_are_grouped_by_their_chunk_not_their_wording():
+    responses = [[
+        BrainstormResponse(question="How much should marketing get?", answers=["10%"], chunk_index=0),
+        BrainstormResponse(question="Who do we hire first?", answers=["A designer"], chunk_index=1),
+    ]]
+    topics = IdeaSymphony()._group_by_topic(responses, CHUNKS)
+    assert [(heading, [[r.answers for r in p] for p in grouped]) for heading, grouped in topics] == [
+        ("Budget", [[["10%"]]]),
+        ("Team", [[["A designer"]]]),
+    ]
+
+def test_hierarchical_synthesis_falls_back_to_one_call_for_a_single_topic():
+    # Rephrased questions without a chunk index all land in "Other"
+    responses = [[BrainstormResponse(question="Something else", answers=["x"])]]
+    stage, _ = asyncio.run(IdeaSymphony()._prepare_synthesis(responses, CHUNKS, "hierarchical"))
+    assert stage == "synthesis"
@@ -1,23 +1,82 @@
 import streamlit as st
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-import httpx
 from client import IdeaSymphonyClient
+from runtime import http_client, iterate_async, run_async
 import json, os
 from shared.models import (
     IdeaInput, BrainstormingContext, BrainstormQuestions,
-    BrainstormResponse, BrainstormSynthesis
+    BrainstormResponse, BrainstormSynthesis, SessionIndex
 )
+from shared.stages import chunk_questions
 
-# Helper to run async functions in Streamlit
-def run_async(coro):
+# Pipeline artifacts in stage order; changing one makes every later one stale
+ARTIFACTS = ["context", "question_sets", "synthesized_questions", "question_chunks", "all_responses", "final_synthesis"]
+
+def new_client(use_mock_data: bool, session_id: Optional[str] = None) -> IdeaSymphonyClient:
+    """Create the API client and keep its session id in the URL so a refresh can resume it"""
+    client = IdeaSymphonyClient(use_mock_data=use_mock_data, session_id=session_id, http=http_client())
+    st.query_params["session"] = client.session_id
+    return client
+
+def invalidate_from(artifact: str):
+    """Forget an artifact and everything derived from it"""
+    for key in ARTIFACTS[ARTIFACTS.index(artifact):]:
+        st.session_state[key] = None
+
+def session_index() -> SessionIndex:
+    """Index of the current question chunks, rebuilt only when the chunks change"""
+    chunks = st.session_state.question_chunks
+    if st.session_state.get("session_index_source") is not chunks:
+        st.session_state.session_index = SessionIndex.from_chunks(chunks or [])
+        st.session_state.session_index_source = chunks
+    return st.session_state.session_index
+
+def save_settings():
+    """Checkpoint the step 3 and 6 choices so a resumed session can pick up where it left off"""
+    run_async(st.session_state.client.save_stage("settings", {
+        key: st.session_state[key]
+        for key in ("model_count", "participant_count", "include_human", "human_brainstorm_responses")
+        if key in st.session_state
+    }))
+
+def restore_session():
+    """Repopulate session state from the backend's checkpoints after a refresh or restart"""
     try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
+        checkpoint = run_async(st.session_state.client.get_session())
+    except Exception:
+        return
+    if not checkpoint:
+        return
+    stages = checkpoint["stages"]
+    st.session_state.idea_input = stages.get("idea_input")
+    for key in ARTIFACTS:
+        st.session_state[key] = stages.get(key)
+    settings = stages.get("settings", {})
+    for key, value in settings.items():
+        st.session_state[key] = value
+    # Chunking runs client-side, so rebuild the chunks from the final question set
+    question_sets = st.session_state.question_sets or []
+    if st.session_state.synthesized_questions is None and len(question_sets) == 1:
+        st.session_state.synthesized_questions = question_sets[0]
+    if st.session_state.question_chunks is None and st.session_state.synthesized_questions:
+        st.session_state.question_chunks = chunk_questions(
+            BrainstormQuestions(**st.session_state.synthesized_questions)
+        )
+    # Resume at the furthest step whose inputs are all available
+    if st.session_state.final_synthesis:
+        st.session_state.step = 8
+    elif st.session_state.all_responses:
+        st.session_state.step = 7
+    elif st.session_state.question_chunks and settings:
+        needs_human = settings.get("include_human") and "human_brainstorm_responses" not in settings
+        st.session_state.step = 6 if needs_human else 7
+    elif st.session_state.question_sets and settings:
+        st.session_state.step = 4
+    elif st.session_state.context:
+        st.session_state.step = 3 if settings else 2
+    elif st.session_state.idea_input:
+        st.session_state.step = 2
 
 def initialize_session_state():
     """Initialize all session state variables"""
@@ -26,7 +85,7 @@ def initialize_session_state():
     if 'use_mock_data' not in st.session_state:
         st.session_state.use_mock_data = False
     if 'client' not in st.session_state:
-        st.session_state.client = IdeaSymphonyClient(use_mock_data=st.session_state.use_mock_data)
+        st.session_state.client = new_client(st.session_state.use_mock_data, st.query_params.get("session"))
     if 'idea_input' not in st.session_state:
         st.session_state.idea_input = None
     if 'context' not in st.session_state:
@@ -43,12 +102,26 @@ def initialize_session_state():
         st.session_state.final_synthesis = None
     if 'error' not in st.session_state:
         st.session_state.error = None
+    if 'restored' not in st.session_state:
+        st.session_state.restored = True
+        restore_session()
 
 def handle_error(error: Exception):
     """Handle and display errors"""
     st.session_state.error = str(error)
     st.error(f"An error occurred: {error}")
 
+def render_chunk_results(chunk_results: Dict[int, Dict[str, Any]]):
+    """Render one participant's streamed chunk results in chunk order"""
+    for idx in sorted(chunk_results):
+        result = chunk_results[idx]
+        if result.get("heading"):
+            st.markdown(f"### {result['heading']}")
+        for response in result["responses"]:
+            st.markdown(f"#### {response['question']}")
+            for answer in response.get("answers", []):
+                st.markdown(f"- {answer}")
+
 def main():
     st.set_page_config(page_title="Idea Symphony", page_icon="🎵", layout="wide")
     st.title("💡 Idea Symphony 🎵")
@@ -69,7 +142,7 @@ def main():
         # Update client if mock data setting changed
         if use_mock_data != st.session_state.use_mock_data:
             st.session_state.use_mock_data = use_mock_data
-            st.session_state.client = IdeaSymphonyClient(use_mock_data=use_mock_data)
+            st.session_state.client = new_client(use_mock_data)
             # Clear any existing data when switching modes
             for key in ['context', 'question_sets', 'synthesized_questions', 
                        'question_chunks', 'all_responses', 'final_synthesis']:
@@ -94,20 +167,32 @@ def main():
             submit_button = st.form_submit_button("Start Brainstorming")
             
             if submit_button:
-                document_content = None
-                if uploaded_file is not None:
-                    document_content = uploaded_file.read().decode("utf-8")
+                document = None
                 # If using mock data, override idea_text and ignore uploaded file
                 if st.session_state.use_mock_data:
                     mock_data_path = os.path.join(os.path.dirname(__file__), "mock_data.json")
                     with open(mock_data_path, "r") as f:
                         mock_data = json.load(f)
                     idea_text = mock_data.get("idea_text")
-                    document_content = None
-                st.session_state.idea_input = {
+                elif uploaded_file is not None:
+                    # Keep only the id; the backend reads the text when building context. Ids follow the
+                    # content, so resubmitting the same file (e.g. after Back) stores nothing new and keeps the context
+                    try:
+                        document = run_async(
+                            st.session_state.client.upload_document(uploaded_file.name, uploaded_file)
+                        )
+                    except Exception as e:
+                        handle_error(e)
+                        return
+                idea_input = {
                     "idea_text": idea_text,
-                    "document_content": document_content
+                    "document_id": document["document_id"] if document else None,
+                    "document_name": document["filename"] if document else None
                 }
+                # A changed idea makes the context and everything after it stale
+                if idea_input != st.session_state.idea_input:
+                    invalidate_from("context")
+                st.session_state.idea_input = idea_input
                 st.session_state.step = 2
                 st.rerun()
     
@@ -119,9 +204,8 @@ def main():
         st.markdown("#### Your Idea:")
         st.markdown(st.session_state.idea_input["idea_text"])
         
-        if st.session_state.idea_input["document_content"]:
-            with st.expander("View Uploaded Document"):
-                st.markdown(st.session_state.idea_input["document_content"])
+        if st.session_state.idea_input.get("document_id"):
+            st.caption(f"Supporting document: {st.session_state.idea_input.get('document_name') or 'uploaded file'}")
         
         # Create context document if not already done
         if st.session_state.context is None:
@@ -130,7 +214,7 @@ def main():
                     st.session_state.context = run_async(
                         st.session_state.client.create_context(
                             st.session_state.idea_input["idea_text"],
-                            st.session_state.idea_input["document_content"]
+                            document_id=st.session_state.idea_input.get("document_id")
                         )
                     )
                 except Exception as e:
@@ -145,9 +229,14 @@ def main():
             height=300
         )
         
-        # Update context if edited
+        # Update context if edited; questions generated from the old context are stale
         if context_text != st.session_state.context["context"]:
-            st.session_state.context["context"] = context_text
+            st.session_state.context = {"context": context_text}
+            invalidate_from("question_sets")
+            try:
+                run_async(st.session_state.client.save_stage("context", st.session_state.context))
+            except Exception as e:
+                handle_error(e)
         
         # Navigation buttons
         col1, col2 = st.columns(2)
@@ -176,7 +265,7 @@ def main():
         st.markdown("##### Question Generation")
         model_count = st.slider(
             "Number of question-generating models to use:",
-            1, 3, 1,
+            1, 3, st.session_state.get("model_count", 1),
             key="model_count_slider"
         )
         
@@ -184,11 +273,14 @@ def main():
         st.markdown("##### Brainstorming Participants")
         participant_count = st.slider(
             "Number of AI brainstorming participants:",
-            2, 5, 2
+            2, 5, st.session_state.get("participant_count", 2)
         )
         
         # Human participation option
-        include_human = st.checkbox("I want to participate in the brainstorming")
+        include_human = st.checkbox(
+            "I want to participate in the brainstorming",
+            value=st.session_state.get("include_human", False)
+        )
         
         # Display estimated processing time
         st.info(f"Estimated processing time: {participant_count * 2}-{participant_count * 5} minutes")
@@ -196,8 +288,11 @@ def main():
         # Store settings in session state
         if 'model_count' not in st.session_state or st.session_state.model_count != model_count:
             st.session_state.model_count = model_count
-            st.session_state.question_sets = None
+            invalidate_from("question_sets")
         
+        if (st.session_state.get("participant_count") != participant_count
+                or st.session_state.get("include_human") != include_human):
+            invalidate_from("all_responses")
         st.session_state.participant_count = participant_count
         st.session_state.include_human = include_human
         
@@ -210,6 +305,11 @@ def main():
         
         with col2:
             if st.button("Generate Questions ➡️"):
+                try:
+                    save_settings()
+                except Exception as e:
+                    handle_error(e)
+                    return
                 st.session_state.step = 4
                 st.rerun()
     
@@ -236,8 +336,10 @@ def main():
                     handle_error(e)
                     return
         
-        # If only one model, pre-chunk questions for later steps
-        if st.session_state.model_count == 1:
+        # If only one model, its question set is final; chunk it once for later steps
+        if (st.session_state.model_count == 1 and st.session_state.question_sets
+                and st.session_state.question_chunks is None):
+            st.session_state.synthesized_questions = st.session_state.question_sets[0]
             synthesized_model = BrainstormQuestions(**st.session_state.synthesized_questions)
             st.session_state.question_chunks = run_async(
                 st.session_state.client.chunk_questions(synthesized_model)
@@ -319,8 +421,6 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬅️ Back to Question Generation"):
-                st.session_state.synthesized_questions = None
-                st.session_state.question_chunks = None
                 st.session_state.step = 4
                 st.rerun()
         
@@ -340,71 +440,50 @@ def main():
         with st.expander("View Brainstorming Context"):
             st.markdown(st.session_state.context["context"])
         
-        # Initialize human responses if not existing
+        index = session_index()
+        
+        # Initialize human responses if not existing: answers keyed by stable question id
         if 'human_responses' not in st.session_state:
-            st.session_state.human_responses = []
-            for chunk in st.session_state.question_chunks:
-                for question in chunk["questions"]:
-                    st.session_state.human_responses.append({
-                        "question": question["short_summary"],
-                        "answers": [""]
-                    })
+            st.session_state.human_responses = {qid: [""] for qid in index.questions}
+            for response in st.session_state.get("human_brainstorm_responses") or []:
+                qid = index.lookup(response["question"])
+                if qid:
+                    st.session_state.human_responses[qid] = response["answers"]
         
         # Display questions for human to answer
         st.markdown("#### Answer the brainstorming questions:")
         st.markdown("Provide your own responses to the questions below. You can add multiple responses to each question.")
         
-        updated_responses = []
-        
-        for i, chunk in enumerate(st.session_state.question_chunks):
-            st.markdown(f"### {chunk['heading']}")
+        for topic in index.topics:
+            st.markdown(f"### {topic}")
             
-            for j, question in enumerate(chunk["questions"]):
-                st.markdown(f"**{question['short_summary']}**: {question['full_description']}")
+            for question in index.topic_questions(topic):
+                st.markdown(f"**{question.short_summary}**: {question.full_description}")
+                current_answers = st.session_state.human_responses.setdefault(question.id, [""])
                 
-                # Find matching response
-                response_index = next(
-                    (idx for idx, r in enumerate(st.session_state.human_responses)
-                     if r["question"] == question["short_summary"]),
-                    None
-                )
+                # Display text areas for each answer
+                new_answers = []
+                for k, answer in enumerate(current_answers):
+                    new_answer = st.text_area(
+                        f"Response {k+1}",
+                        value=answer,
+                        key=f"human_answer_{question.id}_{k}"
+                    )
+                    new_answers.append(new_answer)
                 
-                if response_index is not None:
-                    current_answers = st.session_state.human_responses[response_index]["answers"]
-                    
-                    # Display text areas for each answer
-                    new_answers = []
-                    for k, answer in enumerate(current_answers):
-                        new_answer = st.text_area(
-                            f"Response {k+1}",
-                            value=answer,
-                            key=f"human_answer_{i}_{j}_{k}"
-                        )
-                        new_answers.append(new_answer)
-                    
-                    # Add button to add another response
-                    if st.button("+ Add another response", key=f"add_response_{i}_{j}"):
-                        new_answers.append("")
-                    
-                    # Store updated answers
-                    updated_response = {
-                        "question": question["short_summary"],
-                        "answers": [a for a in new_answers if a.strip()]
-                    }
-                    updated_responses.append(updated_response)
+                # Add button to add another response
+                if st.button("+ Add another response", key=f"add_response_{question.id}"):
+                    new_answers.append("")
+                
+                # Blank answers are kept while editing and dropped when continuing
+                st.session_state.human_responses[question.id] = new_answers
                 
                 st.markdown("---")
         
-        # Update human responses
-        if updated_responses:
-            st.session_state.human_responses = updated_responses
-        
         # Navigation buttons
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬅️ Back to Participant Selection"):
-                if 'human_responses' in st.session_state:
-                    del st.session_state.human_responses
                 st.session_state.step = 5
                 st.rerun()
         
@@ -413,14 +492,22 @@ def main():
                 # Convert human responses to the expected format
                 human_brainstorm_responses = [
                     {
-                        "question": response["question"],
-                        "answers": [a for a in response["answers"] if a.strip()]
+                        "question": index.questions[qid].short_summary,
+                        "answers": [a for a in answers if a.strip()]
                     }
-                    for response in st.session_state.human_responses
-                    if response["answers"] and any(a.strip() for a in response["answers"])
+                    for qid, answers in st.session_state.human_responses.items()
+                    if qid in index.questions and any(a.strip() for a in answers)
                 ]
                 
+                # AI units are replayed from the backend's checkpoints, so only the merge is redone
+                if human_brainstorm_responses != st.session_state.get("human_brainstorm_responses"):
+                    invalidate_from("all_responses")
                 st.session_state.human_brainstorm_responses = human_brainstorm_responses
+                try:
+                    save_settings()
+                except Exception as e:
+                    handle_error(e)
+                    return
                 st.session_state.step = 7
                 st.rerun()
     
@@ -428,30 +515,48 @@ def main():
     elif st.session_state.step == 7:
         st.markdown("### Step 7: AI Brainstorming")
         
-        # Generate AI responses if not already done
+        # Generate AI responses if not already done, rendering each batch as it arrives
         if st.session_state.all_responses is None:
             progress_bar = st.progress(0)
             status_text = st.empty()
+            participant_count = st.session_state.participant_count
+            live_tabs = st.tabs([f"Participant {i+1}" for i in range(participant_count)])
+            placeholders = [tab.empty() for tab in live_tabs]
+            # participant -> chunk_index -> result, filled in completion order
+            received: List[Dict[int, Dict[str, Any]]] = [{} for _ in range(participant_count)]
+            
+            def collect_responses():
+                context_model = BrainstormingContext(**st.session_state.context)
+                # Items are pulled on this thread so the placeholders can be updated
+                for result in iterate_async(st.session_state.client.stream_brainstorm(
+                    context_model,
+                    st.session_state.question_chunks,
+                    participant_count
+                )):
+                    participant = result["participant"]
+                    received[participant][result["chunk_index"]] = result
+                    progress_bar.progress(result["completed"] / result["total"])
+                    status_text.text(f"Received {result['completed']} of {result['total']} response batches...")
+                    with placeholders[participant].container():
+                        render_chunk_results(received[participant])
             
             try:
-                with st.spinner("Generating AI responses..."):
-                    context_model = BrainstormingContext(**st.session_state.context)
-                    st.session_state.all_responses = run_async(
-                        st.session_state.client.brainstorm(
-                            context_model,
-                            st.session_state.question_chunks,
-                            st.session_state.participant_count
-                        )
-                    )
-                    
-                    # Add human responses if included
-                    if st.session_state.include_human and hasattr(st.session_state, 'human_brainstorm_responses'):
-                        st.session_state.all_responses.append(st.session_state.human_brainstorm_responses)
+                collect_responses()
+                st.session_state.all_responses = [
+                    [resp for idx in sorted(chunks) for resp in chunks[idx]["responses"]]
+                    for chunks in received
+                ]
+                
+                # Add human responses if included
+                if st.session_state.include_human and hasattr(st.session_state, 'human_brainstorm_responses'):
+                    st.session_state.all_responses.append(st.session_state.human_brainstorm_responses)
                 
+                run_async(st.session_state.client.save_stage("all_responses", st.session_state.all_responses))
                 status_text.success("All responses generated!")
             except Exception as e:
                 handle_error(e)
                 return
+            st.rerun()
         
         # Display responses
         st.markdown("#### Brainstorming Responses:")
@@ -461,6 +566,7 @@ def main():
                 f"Participant {i+1}" for i in range(len(st.session_state.all_responses))
             ])
             
+            index = session_index()
             for i, tab in enumerate(participant_tabs):
                 with tab:
                     participant_responses = st.session_state.all_responses[i]
@@ -469,16 +575,11 @@ def main():
                     for response in participant_responses:
                         question = response.get("question")
                         answers = response.get("answers", [])
-                        
-                        # Find topic for this question
-                        topic = None
-                        for chunk in st.session_state.question_chunks:
-                            for question_obj in chunk["questions"]:
-                                if question_obj["short_summary"] == question:
-                                    topic = chunk["heading"]
-                                    break
-                            if topic:
-                                break
+                        chunk_index = response.get("chunk_index")
+                        if chunk_index is not None and chunk_index < len(st.session_state.question_chunks or []):
+                            topic = st.session_state.question_chunks[chunk_index]["heading"]
+                        else:
+                            topic = index.topic_for(question)
                         
                         # Display topic if changed
                         if topic and topic != current_topic:
@@ -496,7 +597,6 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬅️ Back to Previous Step"):
-                st.session_state.all_responses = None
                 if st.session_state.include_human:
                     st.session_state.step = 6
                 else:
@@ -512,20 +612,37 @@ def main():
     elif st.session_state.step == 8:
         st.markdown("### Step 8: Synthesize Results")
         
-        # Synthesize results if not already done
+        # Synthesize results if not already done, rendering the markdown as it streams in
         if st.session_state.final_synthesis is None:
-            with st.spinner("Synthesizing all brainstorming responses..."):
-                try:
-                    all_responses_models = [
-                        [BrainstormResponse(**resp) for resp in participant]
-                        for participant in st.session_state.all_responses
-                    ]
-                    st.session_state.final_synthesis = run_async(
-                        st.session_state.client.synthesize(all_responses_models)
-                    )
-                except Exception as e:
-                    handle_error(e)
-                    return
+            status_text = st.empty()
+            status_text.info("Synthesizing all brainstorming responses...")
+            live_tabs = st.tabs(["Non-Attributed Version", "Attributed Version"])
+            synthesized_placeholder = live_tabs[0].empty()
+            attributed_placeholder = live_tabs[1].empty()
+            
+            def collect_synthesis():
+                all_responses_models = [
+                    [BrainstormResponse(**resp) for resp in participant]
+                    for participant in st.session_state.all_responses
+                ]
+                final = None
+                for progress in iterate_async(st.session_state.client.stream_synthesize(
+                    all_responses_models,
+                    st.session_state.question_chunks
+                )):
+                    synthesis = progress["synthesis"]
+                    synthesized_placeholder.markdown(synthesis.get("synthesized_content") or "")
+                    attributed_placeholder.markdown(synthesis.get("attributed_content") or "")
+                    if progress["done"]:
+                        final = synthesis
+                return final
+            
+            try:
+                st.session_state.final_synthesis = collect_synthesis()
+            except Exception as e:
+                handle_error(e)
+                return
+            st.rerun()
         
         # Display the final synthesis
         st.markdown("#### Final Synthesis:")
@@ -563,15 +680,15 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬅️ Back to Brainstorming"):
-                st.session_state.final_synthesis = None
                 st.session_state.step = 7
                 st.rerun()
         
         with col2:
             if st.button("Start New Brainstorming Session"):
-                # Clear all session state
+                # Clear all session state and start a fresh backend session
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
+                st.query_params.clear()
                 st.rerun()
 
 if __name__ == "__main__":
@@ -1,18 +1,43 @@
+import asyncio
+import copy
+import hashlib
 import httpx
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable, BinaryIO
+from collections import OrderedDict
 from datetime import datetime
 import json
 import os
+import uuid
 from shared.models import (
     IdeaInput, BrainstormingContext, BrainstormQuestions,
     BrainstormResponse, BrainstormSynthesis
 )
+from shared.stages import chunk_questions
 
 class IdeaSymphonyClient:
-    def __init__(self, base_url: str = "http://localhost:8000", use_mock_data: bool = False):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        use_mock_data: bool = False,
+        timeout: float = 60.0,
+        poll_interval: float = 2.0,
+        session_id: Optional[str] = None,
+        memo_size: int = 128,
+        http: Optional[httpx.AsyncClient] = None
+    ):
         self.base_url = base_url
         self.use_mock_data = use_mock_data
-        self.client = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+        self.poll_interval = poll_interval
+        # Identifies this client's requests so the backend can schedule sessions fairly
+        # and checkpoint their outputs; pass a previous id to resume that session
+        self.session_id = session_id or uuid.uuid4().hex
+        # Results of identical requests, so Streamlit reruns never repeat a backend call
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, Any]" = OrderedDict()
+        self.headers = {"X-Session-Id": self.session_id}
+        # A shared pooled client (see runtime.http_client) is left open on close
+        self._owns_client = http is None
+        self.client = http or httpx.AsyncClient(base_url=base_url, timeout=timeout)
         
         # Load mock data if using mock mode
         if self.use_mock_data:
@@ -69,63 +94,111 @@ class IdeaSymphonyClient:
                 }
             }
     
+    def _memo_key(self, name: str, payload: Any) -> str:
+        return hashlib.sha256(json.dumps([name, payload], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value: Any):
+        self._memo[key] = value
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    async def _memoized(self, name: str, payload: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the stored result for an identical earlier call, or make the call and store it"""
+        key = self._memo_key(name, payload)
+        if key not in self._memo:
+            self._remember(key, await call())
+        self._memo.move_to_end(key)
+        # Callers may mutate what they get back, so never hand out the stored object
+        return copy.deepcopy(self._memo[key])
+
+    async def _memoized_stream(
+        self,
+        name: str,
+        payload: Any,
+        stream: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """Replay the items of an identical earlier stream, or stream and store them once it completes"""
+        key = self._memo_key(name, payload)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            for item in self._memo[key]:
+                yield copy.deepcopy(item)
+            return
+        items = []
+        async for item in stream():
+            items.append(copy.deepcopy(item))
+            yield item
+        self._remember(key, items)
+
+    async def _post_json(self, path: str, payload: Any, params: Optional[Dict[str, Any]] = None) -> Any:
+        """POST a JSON body, memoized by path, body and query parameters"""
+        async def call():
+            response = await self.client.post(path, json=payload, params=params, headers=self.headers)
+            response.raise_for_status()
+            return response.json()
+        return await self._memoized(path, [payload, params], call)
+
     async def _get_mock_response(self, endpoint: str) -> Any:
         """Get mock response for an endpoint"""
         if endpoint in self.mock_data:
             return self.mock_data[endpoint]
         raise ValueError(f"No mock data available for endpoint: {endpoint}")
     
-    async def create_context(self, idea_text: str, document_content: Optional[str] = None) -> Dict[str, Any]:
+    async def upload_document(self, filename: str, file: BinaryIO) -> Dict[str, Any]:
+        """Stream a document to the backend and return its DocumentInfo"""
+        if self.use_mock_data:
+            return {"document_id": "mock", "filename": filename, "size_bytes": 0}
+        response = await self.client.post(
+            "/api/documents",
+            files={"file": (filename, file, "text/plain")},
+            headers=self.headers
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def create_context(
+        self,
+        idea_text: str,
+        document_content: Optional[str] = None,
+        document_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Create a context document from the user's input"""
         if self.use_mock_data:
             return await self._get_mock_response("create_context")
             
-        response = await self.client.post(
+        return await self._post_json(
             "/api/create-context",
-            json={
+            {
                 "idea_text": idea_text,
-                "document_content": document_content
+                "document_content": document_content,
+                "document_id": document_id
             }
         )
-        response.raise_for_status()
-        return response.json()
     
     async def generate_questions(self, context: BrainstormingContext, model_count: int = 1) -> List[Dict[str, Any]]:
         """Generate brainstorming questions"""
         if self.use_mock_data:
             return await self._get_mock_response("generate_questions")
-        payload = context.dict()
-        payload["model_count"] = model_count
-        response = await self.client.post(
+        return await self._post_json(
             "/api/generate-questions",
-            json=payload
+            context.dict(),
+            params={"model_count": model_count}
         )
-        response.raise_for_status()
-        return response.json()
     
     async def synthesize_questions(self, question_sets: List[BrainstormQuestions]) -> Dict[str, Any]:
         """Synthesize multiple question sets into one"""
         if self.use_mock_data:
             return await self._get_mock_response("synthesize_questions")
-        payload = [qs.dict() for qs in question_sets]
-        response = await self.client.post(
+        return await self._post_json(
             "/api/synthesize-questions",
-            json=payload
+            [qs.dict() for qs in question_sets]
         )
-        response.raise_for_status()
-        return response.json()
     
     async def chunk_questions(self, questions: BrainstormQuestions) -> List[Dict[str, Any]]:
-        """Chunk questions into groups"""
+        """Chunk questions into groups, locally since chunking is a pure transformation"""
         if self.use_mock_data:
             return await self._get_mock_response("chunk_questions")
-        payload = questions.dict()
-        response = await self.client.post(
-            "/api/chunk-questions",
-            json=payload
-        )
-        response.raise_for_status()
-        return response.json()
+        return chunk_questions(questions)
     
     async def brainstorm(
         self,
@@ -136,30 +209,228 @@ class IdeaSymphonyClient:
         """Generate brainstorming responses"""
         if self.use_mock_data:
             return await self._get_mock_response("brainstorm")
+        async def call():
+            # Large sessions outlive a single request timeout, so run them as a background job
+            job = await self.submit_brainstorm_job(context, question_chunks, participant_count)
+            return await self.wait_for_job(job["job_id"])
+        return await self._memoized("brainstorm", [context.dict(), question_chunks, participant_count], call)
+    
+    async def stream_brainstorm(
+        self,
+        context: BrainstormingContext,
+        question_chunks: List[Dict[str, Any]],
+        participant_count: int = 2
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield brainstorming results per (participant, chunk) as the backend completes them"""
+        if self.use_mock_data:
+            mock_responses = await self._get_mock_response("brainstorm")
+            for participant in range(participant_count):
+                yield {
+                    "participant": participant,
+                    "chunk_index": 0,
+                    "heading": None,
+                    "responses": mock_responses[participant % len(mock_responses)],
+                    "completed": participant + 1,
+                    "total": participant_count
+                }
+            return
         payload = {
             "context": context.dict(),
-            "question_chunks": question_chunks,
-            "participant_count": participant_count
+            "question_chunks": question_chunks
         }
-        response = await self.client.post(
-            "/api/brainstorm",
-            json=payload
-        )
-        response.raise_for_status()
-        return response.json()
+
+        async def stream():
+            # Units can take minutes, so only the connect/write phases are time-bounded
+            async with self.client.stream(
+                "POST",
+                "/api/brainstorm/stream",
+                json=payload,
+                params={"participant_count": participant_count},
+                timeout=httpx.Timeout(60.0, read=None),
+                headers=self.headers
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    result = json.loads(line)
+                    if "error" in result:
+                        raise RuntimeError(result["error"])
+                    yield result
+
+        async for result in self._memoized_stream("brainstorm/stream", [payload, participant_count], stream):
+            yield result
     
-    async def synthesize(self, all_responses: List[List[BrainstormResponse]]) -> Dict[str, Any]:
+    def _synthesis_payload(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]]
+    ) -> Any:
+        responses = [[resp.dict() for resp in participant] for participant in all_responses]
+        if question_chunks is None:
+            return responses
+        # With question chunks the backend can synthesize large sessions topic by topic
+        return {"all_responses": responses, "question_chunks": question_chunks}
+    
+    async def synthesize(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """Synthesize all brainstorming responses"""
         if self.use_mock_data:
             return await self._get_mock_response("synthesize")
-        payload = [[resp.dict() for resp in participant] for participant in all_responses]
+        return await self._post_json("/api/synthesize", self._synthesis_payload(all_responses, question_chunks))
+    
+    async def stream_synthesize(
+        self,
+        all_responses: List[List[BrainstormResponse]],
+        question_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the synthesis as it is generated; the last item has done set"""
+        if self.use_mock_data:
+            yield {"synthesis": await self._get_mock_response("synthesize"), "done": True}
+            return
+        payload = self._synthesis_payload(all_responses, question_chunks)
+
+        async def stream():
+            async with self.client.stream(
+                "POST",
+                "/api/synthesize/stream",
+                json=payload,
+                timeout=httpx.Timeout(60.0, read=None),
+                headers=self.headers
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    progress = json.loads(line)
+                    if "error" in progress:
+                        raise RuntimeError(progress["error"])
+                    yield progress
+
+        async for progress in self._memoized_stream("synthesize/stream", payload, stream):
+            yield progress
+    
+    async def run_session(
+        self,
+        idea_text: str,
+        document_content: Optional[str] = None,
+        model_count: int = 1,
+        participant_count: int = 2,
+        human_responses: Optional[List[Dict[str, Any]]] = None,
+        document_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run the whole brainstorming pipeline server-side in one request"""
+        if self.use_mock_data:
+            all_responses = list(await self._get_mock_response("brainstorm"))
+            if human_responses:
+                all_responses.append(human_responses)
+            return {
+                "session_id": "mock",
+                "context": await self._get_mock_response("create_context"),
+                "question_sets": await self._get_mock_response("generate_questions"),
+                "synthesized_questions": await self._get_mock_response("synthesize_questions"),
+                "question_chunks": await self._get_mock_response("chunk_questions"),
+                "all_responses": all_responses,
+                "final_synthesis": await self._get_mock_response("synthesize")
+            }
+        payload = {
+            "idea_input": {
+                "idea_text": idea_text,
+                "document_content": document_content,
+                "document_id": document_id
+            },
+            "model_count": model_count,
+            "participant_count": participant_count,
+            "human_responses": human_responses
+        }
+        # A full session spans every stage, so run it as a background job
         response = await self.client.post(
-            "/api/synthesize",
-            json=payload
+            "/api/jobs/sessions",
+            json=payload,
+            headers=self.headers
         )
         response.raise_for_status()
+        return await self.wait_for_job(response.json()["job_id"])
+    
+    async def submit_brainstorm_job(
+        self,
+        context: BrainstormingContext,
+        question_chunks: List[Dict[str, Any]],
+        participant_count: int = 2
+    ) -> Dict[str, Any]:
+        """Queue a brainstorm on the backend and return its job status"""
+        payload = {
+            "context": context.dict(),
+            "question_chunks": question_chunks
+        }
+        response = await self.client.post(
+            "/api/jobs/brainstorm",
+            json=payload,
+            params={"participant_count": participant_count},
+            headers=self.headers
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Fetch the status and progress of a background job"""
+        response = await self.client.get(f"/api/jobs/{job_id}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_job_result(self, job_id: str) -> Any:
+        """Fetch the result of a finished background job"""
+        response = await self.client.get(f"/api/jobs/{job_id}/result", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running background job"""
+        response = await self.client.delete(f"/api/jobs/{job_id}", headers=self.headers)
+        response.raise_for_status()
         return response.json()
     
+    async def wait_for_job(
+        self,
+        job_id: str,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Any:
+        """Poll a background job until it finishes and return its result"""
+        while True:
+            job = await self.get_job(job_id)
+            if on_progress is not None:
+                on_progress(job)
+            if job["status"] == "succeeded":
+                return await self.get_job_result(job_id)
+            if job["status"] in ("failed", "cancelled"):
+                raise RuntimeError(f"Job {job_id} {job['status']}: {job.get('error') or ''}".strip())
+            await asyncio.sleep(self.poll_interval)
+    
+    async def get_session(self) -> Optional[Dict[str, Any]]:
+        """Checkpointed stage outputs for this client's session, or None if nothing is stored"""
+        if self.use_mock_data:
+            return None
+        response = await self.client.get(f"/api/sessions/{self.session_id}", headers=self.headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def save_stage(self, stage: str, value: Any) -> None:
+        """Checkpoint a stage output edited locally; the backend drops later stages"""
+        if self.use_mock_data:
+            return
+        response = await self.client.put(
+            f"/api/sessions/{self.session_id}/stages/{stage}",
+            json=value,
+            headers=self.headers
+        )
+        response.raise_for_status()
+
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Close the HTTP client, unless it is shared"""
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,88 @@
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+import httpx
+
+# Streamlit re-executes app.py on every interaction, but imported modules are
+# loaded once per process, so these singletons are shared by every browser session.
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_http: Optional[httpx.AsyncClient] = None
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name) or default)
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop, running forever on a daemon thread"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="idea-symphony-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the shared loop and block the calling (script) thread for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result()
+
+def iterate_async(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """Drive an async iterator on the shared loop, yielding its items on the calling thread
+
+    Streamlit elements can only be updated from the script thread, so streams
+    are pulled one item at a time rather than consumed inside the loop.
+    """
+    try:
+        while True:
+            try:
+                yield run_async(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_async(agen.aclose())
+
+def http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client shared by every session; only use it from the shared loop
+
+    Connection limits come from IDEA_SYMPHONY_HTTP_MAX_CONNECTIONS and
+    IDEA_SYMPHONY_HTTP_MAX_KEEPALIVE; IDEA_SYMPHONY_HTTP2=1 enables HTTP/2
+    when the h2 package is installed.
+    """
+    global _http
+    with _lock:
+        if _http is None:
+            http2 = os.getenv("IDEA_SYMPHONY_HTTP2") == "1"
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    http2 = False
+            _http = httpx.AsyncClient(
+                base_url=os.getenv("BACKEND_URL", "http://localhost:8000"),
+                timeout=60.0,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=_env_int("IDEA_SYMPHONY_HTTP_MAX_CONNECTIONS", 100),
+                    max_keepalive_connections=_env_int("IDEA_SYMPHONY_HTTP_MAX_KEEPALIVE", 20)
+                )
+            )
+        return _http
+
+@atexit.register
+def shutdown():
+    """Close the shared client's connections and stop the loop thread"""
+    global _loop, _thread, _http
+    with _lock:
+        loop, thread, http = _loop, _thread, _http
+        _loop = _thread = _http = None
+    if loop is None:
+        return
+    if http is not None:
+        asyncio.run_coroutine_threadsafe(http.aclose(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    loop.close()
@@ -1,10 +1,19 @@
+import hashlib
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic.json_schema import SkipJsonSchema
+from typing import Any, Dict, List, Literal, Optional
 
 class IdeaInput(BaseModel):
     """Initial user input for idea brainstorming"""
     idea_text: str = Field(description="The initial idea description")
     document_content: Optional[str] = Field(None, description="Optional uploaded document content")
+    document_id: Optional[str] = Field(None, description="Id of a document uploaded to /api/documents, used when document_content is empty")
+
+class DocumentInfo(BaseModel):
+    """A document stored by the upload endpoint"""
+    document_id: str = Field(description="Id to reference the document from IdeaInput")
+    filename: Optional[str] = Field(None, description="Original file name")
+    size_bytes: int = Field(description="Size of the stored document in bytes")
 
 class BrainstormingContext(BaseModel):
     """Distilled context document for brainstorming"""
@@ -28,8 +37,138 @@ class BrainstormResponse(BaseModel):
     """Response to a brainstorming question"""
     question: str = Field(description="The question being answered")
     answers: List[str] = Field(description="List of unique responses to the question")
+    # Set by the backend from the brainstorm unit, not by the model, so it is left out of the output schema
+    chunk_index: SkipJsonSchema[Optional[int]] = Field(None, description="Index of the question chunk answered")
 
 class BrainstormSynthesis(BaseModel):
     """Final synthesis of all brainstorming responses"""
     synthesized_content: str = Field(description="Synthesized content from all responses")
-    attributed_content: Optional[str] = Field(None, description="Content with attribution to participants") 
\ No newline at end of file
+    attributed_content: Optional[str] = Field(None, description="Content with attribution to participants") 
+
+class BrainstormChunkResult(BaseModel):
+    """Responses from one participant for one question chunk, streamed as soon as they complete"""
+    participant: int = Field(description="Zero-based participant index")
+    chunk_index: int = Field(description="Index of the question chunk that was answered")
+    heading: Optional[str] = Field(None, description="Topic heading of the question chunk")
+    responses: List[BrainstormResponse] = Field(description="Responses for the questions in the chunk")
+    completed: int = Field(description="Number of units completed so far, including this one")
+    total: int = Field(description="Total number of participant/chunk units in the session")
+
+class SynthesisProgress(BaseModel):
+    """Partial or final synthesis streamed while the synthesis agent is generating"""
+    synthesis: BrainstormSynthesis = Field(description="Synthesis generated so far")
+    done: bool = Field(False, description="Whether this is the final, fully validated synthesis")
+
+class SynthesisRequest(BaseModel):
+    """Responses to synthesize, with the question chunks needed for per-topic synthesis"""
+    all_responses: List[List[BrainstormResponse]] = Field(description="Responses per participant")
+    question_chunks: Optional[List[Dict[str, Any]]] = Field(None, description="Questions grouped by topic")
+    mode: Literal["single", "hierarchical", "auto"] = Field("auto", description="single, hierarchical, or auto to decide by response volume")
+
+class SessionRequest(BaseModel):
+    """Input and settings for running a complete brainstorming session server-side"""
+    idea_input: IdeaInput = Field(description="The user's idea and optional document")
+    model_count: int = Field(1, ge=1, description="Number of question-generating models")
+    participant_count: int = Field(2, ge=1, description="Number of AI brainstorming participants")
+    human_responses: Optional[List[BrainstormResponse]] = Field(None, description="Optional responses from a human participant")
+
+class SessionResult(BaseModel):
+    """All artifacts produced by a brainstorming session"""
+    session_id: str = Field(description="Identifier of the session")
+    context: BrainstormingContext = Field(description="Distilled brainstorming context")
+    question_sets: List[BrainstormQuestions] = Field(description="Question sets from each model")
+    synthesized_questions: BrainstormQuestions = Field(description="Synthesized question set")
+    question_chunks: List[Dict[str, Any]] = Field(description="Questions grouped by topic")
+    all_responses: List[List[BrainstormResponse]] = Field(description="Responses per participant")
+    final_synthesis: BrainstormSynthesis = Field(description="Final synthesis of all responses")
+
+class BatchRequest(BaseModel):
+    """Many ideas to run through the full pipeline with shared settings"""
+    ideas: List[IdeaInput] = Field(min_length=1, description="Ideas to brainstorm")
+    model_count: int = Field(1, ge=1, description="Number of question-generating models per idea")
+    participant_count: int = Field(2, ge=1, description="Number of AI brainstorming participants per idea")
+    concurrency: Optional[int] = Field(None, ge=1, description="Ideas processed at once; defaults to the server setting")
+    batch_id: Optional[str] = Field(None, description="Id to checkpoint items under; resubmitting a batch with it resumes")
+
+class BatchItemResult(BaseModel):
+    """Outcome of one idea of a batch, streamed when it finishes"""
+    index: int = Field(description="Position of the idea in the batch request")
+    session_id: str = Field(description="Session the idea was checkpointed under")
+    result: Optional[SessionResult] = Field(None, description="Session artifacts, if the idea succeeded")
+    error: Optional[str] = Field(None, description="Error message, if the idea failed")
+
+class SessionCheckpoint(BaseModel):
+    """Stage outputs stored for a session so it can be resumed"""
+    session_id: str = Field(description="Identifier of the session")
+    stages: Dict[str, Any] = Field(description="Stored output of each completed stage, by stage name")
+    completed_units: int = Field(0, description="Brainstorm (participant, chunk) units stored for the session")
+
+class JobStatus(BaseModel):
+    """Status and progress of a background job"""
+    job_id: str = Field(description="Identifier of the job")
+    kind: str = Field(description="Kind of work, e.g. session or brainstorm")
+    status: str = Field(description="One of queued, running, succeeded, failed or cancelled")
+    stage: Optional[str] = Field(None, description="Pipeline stage currently running")
+    completed: int = Field(0, description="Units completed within the current stage")
+    total: int = Field(0, description="Total units within the current stage")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: float = Field(description="Submission time as a Unix timestamp")
+    started_at: Optional[float] = Field(None, description="Start time as a Unix timestamp")
+    finished_at: Optional[float] = Field(None, description="Completion time as a Unix timestamp")
+
+def normalize_question(text: str) -> str:
+    """Case- and whitespace-insensitive form of a question's short summary"""
+    return " ".join(text.lower().split())
+
+def question_id(short_summary: str) -> str:
+    """Stable id for a question, derived from its normalized short summary"""
+    return hashlib.sha1(normalize_question(short_summary).encode("utf-8")).hexdigest()[:12]
+
+class IndexedQuestion(BaseModel):
+    """A question with its stable id and the topic it belongs to"""
+    id: str = Field(description="Stable question id, see question_id")
+    topic: str = Field(description="Heading of the chunk the question belongs to")
+    short_summary: str = Field(description="Short summary of the question")
+    full_description: str = Field(description="Full description of the question")
+
+class SessionIndex(BaseModel):
+    """Questions and topics of a session indexed by stable question id
+
+    Replaces scans over question chunks keyed on free-text summaries with
+    dictionary lookups: question -> topic and topic -> questions.
+    """
+    topics: List[str] = Field(default_factory=list, description="Topic headings in chunk order")
+    questions: Dict[str, IndexedQuestion] = Field(default_factory=dict, description="Questions by id, in chunk order")
+    topic_question_ids: Dict[str, List[str]] = Field(default_factory=dict, description="Question ids by topic")
+
+    @classmethod
+    def from_chunks(cls, question_chunks: List[Dict[str, Any]]) -> "SessionIndex":
+        index = cls()
+        for chunk in question_chunks:
+            if chunk["heading"] not in index.topic_question_ids:
+                index.topics.append(chunk["heading"])
+            topic_ids = index.topic_question_ids.setdefault(chunk["heading"], [])
+            for question in chunk["questions"]:
+                qid = question_id(question["short_summary"])
+                if qid in index.questions:
+                    continue
+                index.questions[qid] = IndexedQuestion(
+                    id=qid,
+                    topic=chunk["heading"],
+                    short_summary=question["short_summary"],
+                    full_description=question["full_description"]
+                )
+                topic_ids.append(qid)
+        return index
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Id of an indexed question given its short summary, or None"""
+        qid = question_id(question)
+        return qid if qid in self.questions else None
+
+    def topic_for(self, question: str) -> Optional[str]:
+        qid = self.lookup(question)
+        return self.questions[qid].topic if qid else None
+
+    def topic_questions(self, topic: str) -> List[IndexedQuestion]:
+        return [self.questions[qid] for qid in self.topic_question_ids.get(topic, [])]